@@ -0,0 +1,76 @@
+import numpy as np
+
+def chunked_histogram(values: np.ndarray, bins: int, value_range: tuple, scale: float = 1.0, chunk_size: int = 1 << 22) -> tuple:
+    '''
+    Calculates a histogram of the given (memory-mapped) values in chunks, so only one chunk is held
+    in memory at a time.
+
+            Parameters:
+                    values (np.ndarray): Values (e.g. the 'difference' field of load_timediff)
+                    bins (int): Number of bins
+                    value_range (tuple): Lower and upper edge of the histogram (after scaling)
+                    scale (float): Factor applied to the values (e.g. 1000000 for µs)
+                    chunk_size (int): Number of values processed at once
+
+            Returns:
+                    counts (np.ndarray): Number of values in each bin
+                    edges (np.ndarray): Edges of the bins
+    '''
+    edges = np.linspace(value_range[0], value_range[1], bins + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+
+    for start in range(0, len(values), chunk_size):
+        counts += np.histogram(np.asarray(values[start:start + chunk_size]) * scale, bins=edges)[0]
+
+    return counts, edges
+
+def chunked_range(values: np.ndarray, scale: float = 1.0, chunk_size: int = 1 << 22) -> tuple:
+    '''
+    Returns the minimum and maximum of the given (memory-mapped) values, calculated in chunks.
+    '''
+    minimum, maximum = np.inf, -np.inf
+    for start in range(0, len(values), chunk_size):
+        chunk = np.asarray(values[start:start + chunk_size])
+        minimum = min(minimum, float(chunk.min()))
+        maximum = max(maximum, float(chunk.max()))
+
+    return minimum * scale, maximum * scale
+
+def chunked_mean(values: np.ndarray, scale: float = 1.0, chunk_size: int = 1 << 22) -> float:
+    '''
+    Returns the mean of the given (memory-mapped) values, calculated in chunks.
+    '''
+    total = 0.0
+    for start in range(0, len(values), chunk_size):
+        total += float(np.sum(values[start:start + chunk_size]))
+
+    return total / len(values) * scale
+
+def envelope(positions: np.ndarray, values: np.ndarray, windows: int = 2000, scale: float = 1.0) -> dict:
+    '''
+    Downsamples a time series (e.g. latency by sequence number) to the minimum, maximum and mean of
+    a fixed number of windows. Plotting the envelope instead of every point keeps the shape of the
+    series (including the outliers) at a fraction of the rendering time. Each window is read
+    separately, so memory-mapped data is processed out-of-core.
+
+            Parameters:
+                    positions (np.ndarray): x values of the series (e.g. the 'sequence' field)
+                    values (np.ndarray): y values of the series (e.g. the 'difference' field)
+                    windows (int): Number of windows
+                    scale (float): Factor applied to the values (e.g. 1000000 for µs)
+
+            Returns:
+                    envelope (dict): Dictionary containing the arrays 'position' (first position of
+                                     each window), 'minimum', 'maximum' and 'mean'
+    '''
+    boundaries = np.unique(np.linspace(0, len(values), min(windows, len(values)) + 1).astype(np.int64))
+    result = {key: np.empty(len(boundaries) - 1) for key in ('position', 'minimum', 'maximum', 'mean')}
+
+    for window, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        chunk = np.asarray(values[start:end])
+        result['position'][window] = positions[start]
+        result['minimum'][window] = chunk.min() * scale
+        result['maximum'][window] = chunk.max() * scale
+        result['mean'][window] = chunk.mean() * scale
+
+    return result
@@ -0,0 +1,297 @@
+import os
+import csv
+import math
+import argparse
+from pdc_parsing import load_campaign_index, query_results_database
+
+# Test parameters on which the campaigns are joined (tests with equal values are compared)
+comparison_parameters = ('connection_type', 'datagram_size', 'cycle_time', 'qos', 'stress_type', 'stress_intensity', 'stress_location')
+
+# Latencies that are compared (the percentiles of the reports, e.g. p99_latency, are added)
+comparison_metrics = ('mean_latency', 'maximum_latency', 'mean_jitter')
+
+# Significance level of the Welch test
+significance_level = 0.05
+
+# Columns of the comparison table (after the test parameters)
+comparison_columns = [
+    'metric', 'baseline', 'campaign', 'baseline_tests', 'tests', 'baseline_value', 'value', 'delta', 'ratio', 'p_value', 'significant'
+]
+
+def load_campaigns(sources: list, database: str = None, scenario: str = None) -> dict:
+    '''
+    Loads the per-test summaries of the given campaigns from their campaign index (index.csv) or from
+    the results database of the eParser. The raw timestamps are not read.
+
+            Parameters:
+                    sources (list): Paths to the output folders (or index files) of the campaigns, or
+                                    names of the campaigns in the database ('name' or 'name@run')
+                    database (str): Path to the results database (None to use the campaign indexes)
+                    scenario (str): Only load the tests of this scenario
+
+            Returns:
+                    campaigns (dict): Label of each campaign -> list of reports (see
+                                      pdc_parsing.load_campaign_index), in the order of the sources
+    '''
+    campaigns = dict()
+    for source in sources:
+        if database is not None:
+            campaign, _, run = source.partition('@')
+            reports = query_results_database(database, campaign, run=run or None, scenario=scenario)
+        else:
+            reports = load_campaign_index(source, scenario=scenario)
+
+        # The campaign name is the label, unless the same campaign is loaded twice (e.g. two runs)
+        label = reports[0]['parameters']['campaign'] if reports else os.path.basename(os.path.normpath(source))
+        if label in campaigns:
+            label = source
+        campaigns[label] = reports
+
+    return campaigns
+
+def compare_campaigns(campaigns: dict, parameters: tuple = comparison_parameters, metrics: tuple = None) -> list:
+    '''
+    Compares the latencies of the campaigns with the first campaign (baseline) for the tests with equal
+    parameters. Tests with equal parameters within a campaign (repetitions, e.g. in several
+    scenarios) are combined: each metric is averaged over the tests and compared with the Welch
+    test on the values of the tests (only with at least two tests on both sides). The latency
+    samples within a test are autocorrelated, so they are not used as independent observations.
+
+            Parameters:
+                    campaigns (dict): Label -> reports of each campaign (see load_campaigns)
+                    parameters (tuple): Test parameters on which the campaigns are joined
+                    metrics (tuple): Compared metrics (default: comparison_metrics and the
+                                     percentiles contained in the reports)
+
+            Returns:
+                    rows (list): List of dictionaries (one per parameter combination, campaign and
+                                 metric) containing the parameters and the keys of
+                                 comparison_columns. delta is value minus baseline_value, ratio is
+                                 value divided by baseline_value, p_value is None if no test is
+                                 possible.
+    '''
+    labels = list(campaigns)
+    if metrics is None:
+        percentiles = dict.fromkeys(key for reports in campaigns.values() for report in reports for key in report['timestamps']
+                                    if key.startswith('p') and key.endswith('_latency'))
+        metrics = comparison_metrics + tuple(percentiles)
+
+    groups = {label: __group_reports(reports, parameters) for label, reports in campaigns.items()}
+    baseline = labels[0]
+
+    rows = list()
+    for key, baseline_reports in sorted(groups[baseline].items(), key=lambda item: __sort_key(item[0])):
+        for label in labels[1:]:
+            reports = groups[label].get(key)
+            if reports is None:
+                continue
+
+            for metric in metrics:
+                baseline_summary = __summarize_metric(baseline_reports, metric)
+                summary = __summarize_metric(reports, metric)
+                if baseline_summary is None or summary is None:
+                    continue
+
+                delta = summary['value'] - baseline_summary['value']
+                p_value = welch_test(baseline_summary, summary)
+                rows.append({
+                    **dict(zip(parameters, key)),
+                    'metric': metric,
+                    'baseline': baseline,
+                    'campaign': label,
+                    'baseline_tests': baseline_summary['tests'],
+                    'tests': summary['tests'],
+                    'baseline_value': baseline_summary['value'],
+                    'value': summary['value'],
+                    'delta': delta,
+                    'ratio': summary['value'] / baseline_summary['value'] if baseline_summary['value'] else None,
+                    'p_value': p_value,
+                    'significant': p_value is not None and p_value < significance_level
+                })
+
+    return rows
+
+def welch_test(first: dict, second: dict) -> float:
+    '''
+    Returns the two-sided p-value of the Welch test for the difference of two means. The p-value is
+    calculated from the Student's t-distribution with the Welch-Satterthwaite degrees of freedom
+    (normal approximation for large degrees of freedom).
+
+            Parameters:
+                    first (dict): Mean ('value'), squared standard error ('variance') and degrees of
+                                  freedom ('freedom') of the first sample (see __summarize_metric)
+                    second (dict): The same for the second sample
+
+            Returns:
+                    p_value (float): Probability of a difference at least as large if the means are
+                                     equal (None if the variances are not known or both zero)
+    '''
+    if first['variance'] is None or second['variance'] is None:
+        return None
+
+    variance = first['variance'] + second['variance']
+    if variance <= 0:
+        return None
+
+    t = abs(second['value'] - first['value']) / math.sqrt(variance)
+    freedom = variance ** 2 / (first['variance'] ** 2 / first['freedom'] + second['variance'] ** 2 / second['freedom'])
+
+    if freedom > 1000:
+        return math.erfc(t / math.sqrt(2))
+
+    return __incomplete_beta(freedom / 2, 0.5, freedom / (freedom + t * t))
+
+def write_comparison(rows: list, path: str, parameters: tuple = comparison_parameters) -> None:
+    '''
+    Writes the comparison table as CSV file (values in seconds).
+
+            Parameters:
+                    rows (list): Rows of the comparison (see compare_campaigns)
+                    path (str): Path to the CSV file
+                    parameters (tuple): Test parameters on which the campaigns were joined
+    '''
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(parameters) + comparison_columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_comparison(rows: list, parameters: tuple = comparison_parameters) -> None:
+    '''
+    Prints the comparison table (latencies in µs, significant differences marked with '*').
+    '''
+    header = f'{"metric":<16} {"campaign":<20} {"baseline":>12} {"value":>12} {"delta":>12} {"ratio":>8} {"p-value":>10}'
+    key = None
+    for row in rows:
+        if tuple(row[parameter] for parameter in parameters) != key:
+            key = tuple(row[parameter] for parameter in parameters)
+            print()
+            print(', '.join(f'{parameter}={row[parameter]}' for parameter in parameters) + f' (baseline {row["baseline"]})')
+            print(header)
+
+        ratio = f'{row["ratio"]:.3f}' if row['ratio'] is not None else '-'
+        p_value = f'{row["p_value"]:.2g}' if row['p_value'] is not None else '-'
+        print(f'{row["metric"]:<16} {row["campaign"]:<20} {row["baseline_value"] * 1e6:>9.2f} µs {row["value"] * 1e6:>9.2f} µs '
+              f'{row["delta"] * 1e6:>+9.2f} µs {ratio:>8} {p_value:>9}{"*" if row["significant"] else " "}')
+
+def __group_reports(reports: list, parameters: tuple) -> dict:
+    '''
+    Groups the reports of a campaign by the values of the given test parameters.
+    '''
+    groups = dict()
+    for report in reports:
+        key = tuple(report['basic'].get(parameter, report['parameters'].get(parameter)) for parameter in parameters)
+        groups.setdefault(key, list()).append(report)
+
+    return groups
+
+def __sort_key(key: tuple) -> tuple:
+    '''
+    Sorts parameter values numerically where possible (e.g. datagram_size 80 before 8080).
+    '''
+    return tuple((0, float(value), '') if __number(value) is not None else (1, 0.0, str(value)) for value in key)
+
+def __summarize_metric(reports: list, metric: str) -> dict:
+    '''
+    Combines a metric of the tests with equal parameters of a campaign (see compare_campaigns).
+
+            Returns:
+                    summary (dict): Dictionary containing the keys 'value', 'variance' (squared
+                                    standard error of the value or None), 'freedom' (degrees of
+                                    freedom) and 'tests'. None if no test contains the metric.
+    '''
+    values = [__number(report['timestamps'].get(metric)) for report in reports]
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return {'value': mean, 'variance': None, 'freedom': 0, 'tests': 1}
+
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    return {'value': mean, 'variance': variance / len(values), 'freedom': len(values) - 1, 'tests': len(values)}
+
+def __number(value) -> float:
+    '''
+    Converts a value of a report (text) into a float (None if empty or not a number).
+    '''
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return number if math.isfinite(number) else None
+
+def __incomplete_beta(a: float, b: float, x: float) -> float:
+    '''
+    Returns the regularized incomplete beta function I_x(a, b), evaluated with its continued fraction
+    (modified Lentz method). For the t-distribution with f degrees of freedom, I_(f/(f+t²))(f/2, 1/2)
+    is the two-sided p-value of t.
+    '''
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+
+    # The continued fraction converges quickly for x < (a+1)/(a+b+2), otherwise use the symmetry
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - __incomplete_beta(b, a, 1.0 - x)
+
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)) / a
+
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 500):
+        # Even and odd step of the continued fraction
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+
+        if abs(c * d - 1.0) < 1e-12:
+            break
+
+    return front * fraction
+
+def main(argv: list = None) -> None:
+    '''
+    Compares the latencies of two or more campaigns (the first one is the baseline) and prints the
+    comparison table, e.g.
+
+        python pdc_comparison.py output/<run>/04_1_Base_A output/<run>/04_3_Opt1A_A
+        python pdc_comparison.py --database results.db 04_1_Base_A 04_3_Opt1A_A 04_5_Opt3_A
+
+            Parameters:
+                    argv (list): Command line arguments (default: sys.argv)
+    '''
+    parser = argparse.ArgumentParser(description='Compares the latencies of campaigns with a baseline campaign for tests with equal parameters.')
+    parser.add_argument('campaigns', nargs='+',
+                        help='output folders (or index.csv files) of the campaigns, or campaign names (name or name@run) with --database; the first campaign is the baseline')
+    parser.add_argument('--database', help='results database of the eParser (--database) instead of the campaign indexes')
+    parser.add_argument('--scenario', help='only compare the tests of this scenario')
+    parser.add_argument('--join', nargs='+', default=list(comparison_parameters), metavar='PARAMETER',
+                        help='test parameters on which the campaigns are joined (default: %(default)s)')
+    parser.add_argument('--metrics', nargs='+', metavar='METRIC',
+                        help=f'compared latencies (default: {", ".join(comparison_metrics)} and the percentiles)')
+    parser.add_argument('--output', help='write the comparison table to this CSV file')
+    arguments = parser.parse_args(argv)
+
+    if len(arguments.campaigns) < 2:
+        parser.error('at least two campaigns are required')
+
+    campaigns = load_campaigns(arguments.campaigns, arguments.database, arguments.scenario)
+    rows = compare_campaigns(campaigns, tuple(arguments.join), tuple(arguments.metrics) if arguments.metrics else None)
+    print_comparison(rows, tuple(arguments.join))
+
+    if arguments.output:
+        write_comparison(rows, arguments.output, tuple(arguments.join))
+
+
+if __name__ == '__main__':
+    main()
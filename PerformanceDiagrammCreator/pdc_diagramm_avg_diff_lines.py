@@ -1,4 +1,4 @@
-from pdc_parsing import parse_performance_report
+from pdc_parsing import parse_performance_report, load_campaign_index, query_results_database
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -57,22 +57,40 @@ base_paths = [
     '/Users/bornkessel/Developer/testresults/results/performance/output/231221_080404__Linux/01_InitTest_B/ihwk_A1_075018_211223',
 
 ]
+
+# Alternatively, query the campaigns from the results database of the eParser (--database) by name
+# and parameters instead of by path, e.g. ('04_1_Base_A', {'scenario': 'ihwk_A1', 'cycle_time': 0})
+results_database = None
+database_campaigns = [
+    #('04_1_Base_A', {'scenario': 'ihwk_A1_092400_111223'}),
+    #('04_3_Opt1A_A', {'scenario': 'ihwk_A1_111105_111223'}),
+]
+
 all_sorted_reports = []
 combine_data = False
 
-for base_path in base_paths:
+for base_path in (database_campaigns if results_database else base_paths):
     performance_reports = []
 
-    for test_scenario in os.listdir(base_path):
-        test_scenario_path = os.path.join(base_path, test_scenario)
-        if not os.path.isdir(test_scenario_path):
-            continue
+    # Use the results database or the campaign index written by the eParser (a single read), the
+    # performance.xml files otherwise
+    campaign_index_path = os.path.join(os.path.dirname(base_path), 'index.csv') if not results_database else None
+    if results_database:
+        campaign, filters = base_path
+        performance_reports = query_results_database(results_database, campaign, **filters)
+    elif os.path.isfile(campaign_index_path):
+        performance_reports = load_campaign_index(campaign_index_path, scenario=os.path.basename(base_path))
+    else:
+        for test_scenario in os.listdir(base_path):
+            test_scenario_path = os.path.join(base_path, test_scenario)
+            if not os.path.isdir(test_scenario_path):
+                continue
 
-        performance_file_path = os.path.join(test_scenario_path, 'performance.xml')
-        if not os.path.isfile(performance_file_path):
-            continue
+            performance_file_path = os.path.join(test_scenario_path, 'performance.xml')
+            if not os.path.isfile(performance_file_path):
+                continue
 
-        performance_reports.append(parse_performance_report(performance_file_path))
+            performance_reports.append(parse_performance_report(performance_file_path))
 
     # Sort the list of dictionaries by the 'datagram_size' key, then by the 'cycle_time' key
     sorted_reports = sorted(performance_reports, key=lambda k: (int(k['basic']['datagram_size']), int(k['basic']['cycle_time'])))
@@ -99,6 +117,9 @@ for base_path in base_paths:
 
 # Select here what schould be on the x-axis
 x_axis = 'datagram_size'
+
+# Select here the latency on the y-axis (e.g. 'maximum_latency', 'mean_latency', 'p99_latency', 'p99_9_latency')
+y_axis = 'maximum_latency'
 diagram_name = 'campaign-diagr1__cases_by_losses_and_datagram'
 
 base_path_labels = [
@@ -144,7 +165,7 @@ ax.set_ylim(bottom=0, top=400)
 for sorted_reports in all_sorted_reports:
     # Extract the data for the current sorted_reports structure
     x_axis_values = [int(report['basic'][x_axis]) for report in sorted_reports]
-    y_axis_values = [(float(report['timestamps']['maximum_latency'])*1000000) for report in sorted_reports]
+    y_axis_values = [(float(report['timestamps'][y_axis])*1000000) for report in sorted_reports]
     jitter_values = [(float(report['timestamps']['mean_jitter'])*1000000) for report in sorted_reports]
 
     if interpolation:
@@ -1,4 +1,5 @@
-from pdc_parsing import parse_timestamp_messages
+from pdc_parsing import load_timediff, load_latency_aggregates
+from pdc_aggregation import chunked_histogram, chunked_range, chunked_mean, envelope
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -25,18 +26,34 @@ plt.rc('font', family='serif')
 
 
 for base_path in base_paths:
-    timediff_file_path = os.path.join(base_path, 'timediff.xml')
-    if not os.path.isfile(timediff_file_path):
-        continue
-
-    timediff_records = parse_timestamp_messages(timediff_file_path)
+    # Pre-aggregated latencies of the eParser (histogram and envelope), fallback: timediff file
+    aggregates = load_latency_aggregates(base_path)
+
+    if aggregates is None:
+        if not os.path.isfile(os.path.join(base_path, 'timediff.npy')) and not os.path.isfile(os.path.join(base_path, 'timediff.xml')):
+            continue
+
+        # Memory-mapped, the records are only read chunk by chunk
+        timediff_records = load_timediff(base_path)
+        differences = timediff_records['difference']
+        counts, edges = chunked_histogram(differences, bins=950, value_range=chunked_range(differences, scale=1000000), scale=1000000)
+        mean = chunked_mean(differences, scale=1000000)
+        latency_envelope = envelope(timediff_records['sequence'], differences, scale=1000000)
+    else:
+        counts, edges = aggregates['histogram_counts'], aggregates['histogram_edges'] * 1000000
+        mean = np.sum(aggregates['envelope_mean'] * aggregates['envelope_count']) / np.sum(aggregates['envelope_count']) * 1000000
+        latency_envelope = {
+            'position': aggregates['envelope_sequence'],
+            'minimum': aggregates['envelope_minimum'] * 1000000,
+            'maximum': aggregates['envelope_maximum'] * 1000000,
+            'mean': aggregates['envelope_mean'] * 1000000
+        }
 
     # Create a histogram
     fig, ax = plt.subplots(figsize=(7, 6))
-    sns.histplot([(record['difference']*1000000) for record in timediff_records], ax=ax, bins=950, color='#00B0F0')
+    ax.stairs(counts, edges, fill=True, color='#00B0F0')
 
     # Add a line for the mean
-    mean = np.mean([(record['difference']*1000000) for record in timediff_records])
     ax.axvline(mean, color='black', linestyle='dashed', linewidth=1)
 
     # Add a legend with the numer of the mean
@@ -50,7 +67,7 @@ for base_path in base_paths:
     plt.ticklabel_format(style='sci', axis='y', scilimits=(0,0))
 
     # Calculate and add the 95% confidence interval here
-    # data = [(record['difference']*1000000) for record in timediff_records]
+    # data = latencies
     # n = len(data)
     # m, se = np.mean(data), np.std(data)
     # h = se * t.ppf((1 + 0.99) / 2., n-1) # Does not work, nticker.t.ppf is not defined
@@ -73,7 +90,10 @@ for base_path in base_paths:
 
     # Create a plot with the sequence number as x-axis and the difference between the timestamps as y-axis
     fig, ax = plt.subplots(figsize=(7, 6))
-    sns.lineplot(x=[record['sequence'] for record in timediff_records], y=[record['difference']*1000000 for record in timediff_records], ax=ax, color='#00B0F0')
+
+    # Plot the minimum/maximum envelope and the mean of windows instead of every record
+    ax.fill_between(latency_envelope['position'], latency_envelope['minimum'], latency_envelope['maximum'], color='#00B0F0', alpha=0.4, linewidth=0)
+    sns.lineplot(x=latency_envelope['position'], y=latency_envelope['mean'], ax=ax, color='#00B0F0')
 
     # Set the x-axis label
     ax.set_xlabel('Sequence number',  fontweight='bold')
@@ -1,4 +1,8 @@
+import os
+import csv
+import sqlite3
 import xml.etree.ElementTree as ET
+import numpy as np
 
 def parse_performance_report(file_path) -> dict:
     # Parse the XML file
@@ -19,6 +23,101 @@ def parse_performance_report(file_path) -> dict:
 
     return data_dict
 
+def load_campaign_index(path: str, scenario: str = None) -> list:
+    '''
+    Loads the index (index.csv) that the eParser writes into the output folder of each campaign and
+    returns one report per test in the same structure as parse_performance_report ('basic', 'test',
+    'timestamps'; values as text) plus a 'parameters' section with the test parameters.
+
+            Parameters:
+                    path (str): Path to the index file or the output folder of the campaign
+                    scenario (str): Only return the tests of this scenario
+
+            Returns:
+                    reports (list): List of dictionaries (one per test)
+    '''
+    if os.path.isdir(path):
+        path = os.path.join(path, 'index.csv')
+
+    sections = {
+        'basic': ('t_uid', 'datagram_size', 'cycle_time'),
+        'test': ('duration', 'datagrams', 'bandwidth', 'partial'),
+        'parameters': ('campaign', 'scenario', 'test', 'connection_type', 'qos', 'stress_type', 'stress_intensity', 'stress_location')
+    }
+
+    reports = dict()
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if scenario is not None and row['scenario'] != scenario:
+                continue
+
+            report = {section: {key: row[key] for key in keys if key in row} for section, keys in sections.items()}
+            report['timestamps'] = {key: value for key, value in row.items() if not any(key in keys for keys in sections.values())}
+            reports[(row['campaign'], row['scenario'], row['test'])] = report
+
+    return list(reports.values())
+
+def query_results_database(path: str, campaign: str, run: str = None, scenario: str = None, **filters) -> list:
+    '''
+    Queries the tests of a campaign from the results database of the eParser (--database) and returns
+    one report per test in the same structure as load_campaign_index. Without a run, the latest run
+    containing the campaign is used.
+
+            Parameters:
+                    path (str): Path to the SQLite database file
+                    campaign (str): Name of the campaign (e.g. '04_1_Base_A')
+                    run (str): Name of the run (output folder of the execution)
+                    scenario (str): Only return the tests of this scenario
+                    filters: Test parameters to filter (e.g. datagram_size=80, cycle_time=0,
+                             stress_type='CPU', qos='True')
+
+            Returns:
+                    reports (list): List of dictionaries (one per test)
+    '''
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+
+    conditions = ['campaigns.name = ?']
+    parameters = [campaign]
+    if run is not None:
+        conditions.append('runs.name = ?')
+        parameters.append(run)
+    else:
+        conditions.append('runs.id = (SELECT MAX(campaigns.run_id) FROM campaigns WHERE campaigns.name = ?)')
+        parameters.append(campaign)
+    if scenario is not None:
+        conditions.append('scenarios.name = ?')
+        parameters.append(scenario)
+    for column, value in filters.items():
+        if not column.isidentifier():
+            raise ValueError(f'Invalid filter {column}')
+        conditions.append(f'tests.{column} = ?')
+        parameters.append(value)
+
+    tests = connection.execute(f'''
+        SELECT tests.*, campaigns.name AS campaign, scenarios.name AS scenario, tests.name AS test
+        FROM tests
+        JOIN scenarios ON scenarios.id = tests.scenario_id
+        JOIN campaigns ON campaigns.id = scenarios.campaign_id
+        JOIN runs ON runs.id = campaigns.run_id
+        WHERE {' AND '.join(conditions)}
+    ''', parameters).fetchall()
+
+    reports = list()
+    for test in tests:
+        report = {
+            'basic': {'t_uid': test['t_uid'], 'datagram_size': str(test['datagram_size']), 'cycle_time': str(test['cycle_time'])},
+            'test': {'duration': str(test['duration']), 'datagrams': str(test['datagrams']), 'bandwidth': str(test['bandwidth'])},
+            'parameters': {key: str(test[key]) for key in ('campaign', 'scenario', 'test', 'connection_type', 'qos', 'stress_type', 'stress_intensity', 'stress_location')},
+            'timestamps': dict()
+        }
+        for metric in connection.execute('SELECT name, value FROM metrics WHERE test_id = ?', (test['id'],)):
+            report['test' if metric['name'] == 'partial' else 'timestamps'][metric['name']] = str(metric['value'])
+        reports.append(report)
+
+    connection.close()
+    return reports
+
 def parse_timestamp_messages(path: str) -> list:
     '''
     Parses the timestamp messages from the test results file and returns them as a list of dictionaries.
@@ -45,4 +144,116 @@ def parse_timestamp_messages(path: str) -> list:
             'difference': difference,
         })
 
-    return records
\ No newline at end of file
+    return records
+
+def load_timediff(path: str, mmap: bool = True) -> np.ndarray:
+    '''
+    Loads the timestamp differences of a test as structured NumPy array with the fields 'sequence'
+    and 'difference'. The path can point to a timediff.npy or timediff.xml file, or to the output
+    folder of a test (timediff.npy is preferred over timediff.xml).
+
+    By default the data is memory-mapped (read-only): the fields are NumPy views on the file, nothing
+    is copied into memory until it is accessed, so tests with millions of records can be processed
+    in chunks (see pdc_aggregation). A timediff.xml is converted once into a timediff.npy next to it
+    (streaming, without loading the records into memory).
+
+            Parameters:
+                    path (str): Path to the timediff file or the output folder of a test
+                    mmap (bool): Memory-map the data instead of loading it
+
+            Returns:
+                    records (np.ndarray): Structured array containing the timestamp differences
+    '''
+    if os.path.isdir(path):
+        binary_path = os.path.join(path, 'timediff.npy')
+        path = binary_path if os.path.isfile(binary_path) else os.path.join(path, 'timediff.xml')
+
+    if path.endswith('.xml'):
+        binary_path = path[:-len('.xml')] + '.npy'
+        if not os.path.isfile(binary_path) or os.path.getmtime(binary_path) < os.path.getmtime(path):
+            convert_timediff_xml(path, binary_path)
+        path = binary_path
+
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+def convert_timediff_xml(xml_path: str, npy_path: str, chunk_size: int = 1 << 20) -> None:
+    '''
+    Converts a timediff.xml file into a timediff.npy file. The XML file is parsed incrementally and
+    the records are written in chunks, so the memory usage does not depend on the number of records.
+
+            Parameters:
+                    xml_path (str): Path to the timediff.xml file
+                    npy_path (str): Path to the timediff.npy file
+                    chunk_size (int): Number of records written at once
+    '''
+    dtype = np.dtype([('sequence', '<i8'), ('difference', '<f8')])
+    data_path = npy_path + '.part'
+    count = 0
+
+    # Write the records (without header) in chunks
+    with open(data_path, 'wb') as data_file:
+        chunk = np.empty(chunk_size, dtype=dtype)
+        filled = 0
+
+        for _, element in ET.iterparse(xml_path, events=('end',)):
+            if element.tag != 'record':
+                continue
+
+            chunk[filled] = (int(element.find('sequence').text), float(element.find('difference').text))
+            filled += 1
+            element.clear()
+
+            if filled == chunk_size:
+                chunk.tofile(data_file)
+                count += filled
+                filled = 0
+
+        chunk[:filled].tofile(data_file)
+        count += filled
+
+    # Write the header and copy the records
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (count,)}
+    with open(npy_path, 'wb') as npy_file, open(data_path, 'rb') as data_file:
+        np.lib.format.write_array_header_1_0(npy_file, header)
+        while True:
+            data = data_file.read(1 << 24)
+            if not data:
+                break
+            npy_file.write(data)
+
+    os.remove(data_path)
+
+def load_latency_aggregates(path: str) -> dict:
+    '''
+    Loads the latency aggregates (histogram and envelope) that the eParser writes next to the
+    performance.xml of a test (latency_aggregates.npz). All latencies are in seconds.
+
+            Parameters:
+                    path (str): Path to the latency_aggregates.npz file or the output folder of a test
+
+            Returns:
+                    aggregates (dict): Dictionary containing the arrays 'histogram_counts',
+                                       'histogram_edges', 'envelope_sequence', 'envelope_count',
+                                       'envelope_minimum', 'envelope_maximum' and 'envelope_mean'
+                                       and the numbers of latencies outside the histogram
+                                       ('histogram_underflow', 'histogram_overflow', 0 for older
+                                       files), None if the file does not exist (e.g. output of an
+                                       older eParser version)
+    '''
+    if os.path.isdir(path):
+        path = os.path.join(path, 'latency_aggregates.npz')
+
+    if not os.path.isfile(path):
+        return None
+
+    with np.load(path) as archive:
+        aggregates = {key: archive[key] for key in archive.files}
+
+    counts = aggregates.pop('histogram_counts')
+    start = float(aggregates.pop('histogram_start'))
+    width = float(aggregates.pop('histogram_width'))
+    aggregates['histogram_counts'] = counts
+    aggregates['histogram_edges'] = start + width * np.arange(len(counts) + 1)
+    for key in ('histogram_underflow', 'histogram_overflow'):
+        aggregates[key] = int(aggregates.get(key, 0))
+    return aggregates
@@ -0,0 +1,330 @@
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support, get_context
+from constants import start_method, test_description_file, test_results_file, eparser_version, histogram_bin_width, envelope_windows, clock_correction, recover_truncated_results, fast_timestamp_scanner, parallel_sides
+from parsing import parse_result_file, parse_timestamp_messages, parse_description_file, parse_test_results, scan_test_results
+from performance_evaluation import evaluate_performance
+from instrumentation import get_peak_memory
+from json_lines import append_json_line
+import eParser
+
+# Stages that can be benchmarked (each stage runs in a fresh worker process)
+benchmark_stages = ('parse_result_file', 'parse_timestamp_messages', 'parse_test_results', 'scan_test_results', 'evaluate_performance', 'handle_test')
+
+def generate_test(folder: str, scenario: str, test: str, records: int, loss: float = 0.0, reordering: float = 0.0, duplicates: float = 0.0,
+                  datagram_size: int = 80, cycle_time: int = 0, seed: int = 0) -> None:
+    '''
+    Generates a synthetic test (client and server test_description.xml and test_results.xml) in the
+    folder structure of a raw campaign (folder/client/scenario/test and folder/server/scenario/test).
+
+            Parameters:
+                    folder (str): Path to the campaign folder
+                    scenario (str): Name of the scenario
+                    test (str): Name of the test
+                    records (int): Number of timestamp records sent by the client
+                    loss (float): Probability that a record is missing on the server
+                    reordering (float): Probability that a server record is swapped with its successor
+                    duplicates (float): Probability that a server record is received twice
+                    datagram_size (int): Datagram size of the test description
+                    cycle_time (int): Cycle time of the test description
+                    seed (int): Seed of the random number generator
+    '''
+    generator = np.random.default_rng(seed)
+
+    # Client: all sequence numbers in order, send times with 10 µs - 200 µs spacing
+    client_sequences = np.arange(records, dtype=np.int64)
+    client_times = 1700000000 * 1000000000 + np.cumsum(generator.integers(10000, 200000, records))
+
+    # Server: lost records removed, 50 µs - 400 µs latency, duplicates and swapped neighbours
+    received = generator.random(records) >= loss
+    server_sequences = client_sequences[received]
+    server_times = client_times[received] + generator.integers(50000, 400000, len(server_sequences))
+
+    repeats = np.where(generator.random(len(server_sequences)) < duplicates, 2, 1)
+    server_sequences = np.repeat(server_sequences, repeats)
+    server_times = np.repeat(server_times, repeats)
+
+    for index in np.flatnonzero(generator.random(max(len(server_sequences) - 1, 0)) < reordering):
+        server_sequences[[index, index + 1]] = server_sequences[[index + 1, index]]
+        server_times[[index, index + 1]] = server_times[[index + 1, index]]
+
+    for side, sequences, times in (('client', client_sequences, client_times), ('server', server_sequences, server_times)):
+        test_folder = os.path.join(folder, side, scenario, test)
+        os.makedirs(test_folder, exist_ok=True)
+        __write_description(os.path.join(test_folder, test_description_file), test, datagram_size, cycle_time)
+        __write_results(os.path.join(test_folder, test_results_file), records, sequences, times)
+
+def run_benchmark(job: dict, stages: tuple = benchmark_stages, repeat: int = 3, sides: str = parallel_sides) -> list:
+    '''
+    Benchmarks the given stages for a test. Every stage runs in a fresh worker process, so the peak
+    RSS of the process only contains the stage (and the data it needs).
+
+            Parameters:
+                    job (dict): The test (see eParser.__collect_scenario)
+                    stages (tuple): Stages to benchmark (see benchmark_stages)
+                    repeat (int): Number of repetitions of each stage (the fastest one is reported)
+                    sides (str): Parallel parsing of the client and server side in the 'handle_test'
+                                 stage ('off', 'thread' or 'process')
+
+            Returns:
+                    results (list): List of dictionaries containing the following keys: 'stage',
+                                    'records' (client and server records), 'seconds' (fastest
+                                    repetition), 'records_per_second', 'peak_rss' (bytes, None if
+                                    not available)
+    '''
+    records = __count_records(job)
+    results = list()
+
+    for stage in stages:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context(start_method)) as executor:
+            seconds, peak_rss = executor.submit(__run_stage, stage, job, repeat, sides).result()
+
+        results.append({
+            'stage': stage,
+            'records': records,
+            'seconds': seconds,
+            'records_per_second': records / seconds if seconds > 0 else None,
+            'peak_rss': peak_rss
+        })
+
+    return results
+
+def __run_stage(stage: str, job: dict, repeat: int, sides: str) -> tuple:
+    '''
+    Runs a stage repeatedly (worker function) and returns the fastest duration in seconds and the
+    peak RSS of the worker process in bytes.
+    '''
+    client_folder = os.path.join(job['client_path'], job['test_folder'])
+    server_folder = os.path.join(job['server_path'], job['test_folder'])
+
+    # The input of the evaluation is parsed once (not part of the measured duration)
+    if stage == 'evaluate_performance':
+        client_results, client_timestamps = parse_test_results(client_folder, columnar=True)
+        server_results, server_timestamps = parse_test_results(server_folder, columnar=True)
+        test = (parse_description_file(client_folder), client_results, server_results, client_timestamps, server_timestamps)
+
+    durations = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        if stage == 'parse_result_file':
+            parse_result_file(client_folder)
+            parse_result_file(server_folder)
+        elif stage == 'parse_timestamp_messages':
+            parse_timestamp_messages(client_folder)
+            parse_timestamp_messages(server_folder)
+        elif stage == 'parse_test_results':
+            parse_test_results(client_folder, columnar=True)
+            parse_test_results(server_folder, columnar=True)
+        elif stage == 'scan_test_results':
+            if scan_test_results(client_folder) is None or scan_test_results(server_folder) is None:
+                raise ValueError('The fast scanner cannot read the test results files')
+        elif stage == 'evaluate_performance':
+            evaluate_performance(test, os.path.join(job['output_path'], 'evaluate_performance'))
+        elif stage == 'handle_test':
+            eParser.__handle_test(job, __benchmark_options(os.path.dirname(job['output_path']), sides))
+        else:
+            raise ValueError(f'Unknown stage {stage}')
+
+        durations.append(time.perf_counter() - start)
+
+    return min(durations), get_peak_memory()
+
+def validate_scanner(job: dict) -> bool:
+    '''
+    Checks that the fast scanner (parsing.scan_test_results) returns the same results and timestamp
+    records as the XML parser for the client and server test results files of a test. A copy of each
+    file truncated after the timestamp records (within the following sections) has to be rejected by
+    the scanner and recovered by the XML parser with all records.
+    '''
+    for folder in (os.path.join(job['client_path'], job['test_folder']), os.path.join(job['server_path'], job['test_folder'])):
+        scanned = scan_test_results(folder)
+        parsed = parse_test_results(folder, columnar=True)
+        if scanned is None or scanned[0] != parsed[0] or not np.array_equal(scanned[1], parsed[1]):
+            return False
+
+        with tempfile.TemporaryDirectory(prefix='eparser_scanner_') as truncated_folder:
+            with open(os.path.join(folder, test_results_file), 'rb') as file:
+                data = file.read()
+            cut = data.rfind(b'</custom>')
+            cut = data.find(b'<', cut + 1) + (len(data) - data.find(b'<', cut + 1)) // 2
+            with open(os.path.join(truncated_folder, test_results_file), 'wb') as file:
+                file.write(data[:cut])
+
+            if scan_test_results(truncated_folder) is not None:
+                return False
+            recovered = parse_test_results(truncated_folder, columnar=True, recover=True, fast=True)
+            if 'partial' not in recovered[0] or recovered[0].get('report') != parsed[0]['report'] or not np.array_equal(recovered[1], parsed[1]):
+                return False
+
+    return True
+
+def __benchmark_options(execution_folder: str, sides: str) -> dict:
+    '''
+    Returns the options of an execution for the benchmark of __handle_test (see eParser.main).
+    '''
+    return {
+        'version': eparser_version,
+        'workers': 1,
+        'incremental': False,
+        'hash': False,
+        'execution_folder': execution_folder,
+        'database': None,
+        'profile': False,
+        'progress': False,
+        'fast_scan': fast_timestamp_scanner,
+        'parallel_sides': sides,
+        'timediff': False,
+        'timediff_npy': False,
+        'recover': recover_truncated_results,
+        'histogram_bin_width': histogram_bin_width,
+        'envelope_windows': envelope_windows,
+        'clock_correction': clock_correction
+    }
+
+def __count_records(job: dict) -> int:
+    '''
+    Returns the number of timestamp records of the client and server of a test.
+    '''
+    count = 0
+    for path in (job['client_path'], job['server_path']):
+        with open(os.path.join(path, job['test_folder'], test_results_file), 'rb') as file:
+            count += sum(chunk.count(b'<record>') for chunk in iter(lambda: file.read(1 << 20), b''))
+
+    return count
+
+def __write_description(filename: str, t_uid: str, datagram_size: int, cycle_time: int) -> None:
+    '''
+    Writes a test description of a synthetic test.
+    '''
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(f'''<?xml version="1.0"?>
+<test_description>
+    <metadata>
+        <t_uid>{t_uid}</t_uid>
+        <path>benchmark</path>
+    </metadata>
+    <duration>10</duration>
+    <connection>
+        <type>UDP</type>
+        <client_ip>10.0.0.1</client_ip>
+        <server_ip>10.0.0.2</server_ip>
+        <port>5000</port>
+        <cycletime>{cycle_time}</cycletime>
+        <datagram_size>{datagram_size}</datagram_size>
+        <qos>false</qos>
+    </connection>
+    <interface>
+        <client>eth0</client>
+        <server>eth0</server>
+    </interface>
+    <stress>
+        <type>NONE</type>
+        <num>0</num>
+        <location>LOC_BOTH</location>
+    </stress>
+</test_description>
+''')
+
+def __write_results(filename: str, total: int, sequences: np.ndarray, times: np.ndarray, chunk_size: int = 1 << 16) -> None:
+    '''
+    Writes the test results of a synthetic test (the timestamp records are formatted in chunks).
+    '''
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(f'''<?xml version="1.0"?>
+<test_results>
+    <status>STATUS_SUCCESS</status>
+    <custom>
+        <num_total>{total}</num_total>
+        <num_misses>0</num_misses>
+        <elapsed_time>10.0</elapsed_time>
+        <timestamp>
+''')
+        for start in range(0, len(sequences), chunk_size):
+            seconds, nanoseconds = np.divmod(times[start:start + chunk_size], 1000000000)
+            file.write(''.join(
+                f'            <record>\n                <sequence>{sequence}</sequence>\n                <timestamp>\n'
+                f'                    <tv_sec>{second}</tv_sec>\n                    <tv_nsec>{nanosecond}</tv_nsec>\n'
+                f'                </timestamp>\n            </record>\n'
+                for sequence, second, nanosecond in zip(sequences[start:start + chunk_size].tolist(), seconds.tolist(), nanoseconds.tolist())))
+
+        file.write('''        </timestamp>
+    </custom>
+    <ip_statistic>
+        <mtu>
+            <start>1500</start>
+            <end>1500</end>
+        </mtu>
+    </ip_statistic>
+</test_results>
+''')
+
+def main(argv: list = None) -> None:
+    '''
+    Entry point of the benchmark: generates a synthetic test for each record count, benchmarks the
+    stages and prints the results (records per second and peak RSS per stage).
+
+            Parameters:
+                    argv (list): Command line arguments (default: sys.argv)
+    '''
+    parser = argparse.ArgumentParser(description='Benchmark of the eParser with synthetic tests.')
+    parser.add_argument('--records', type=int, nargs='+', default=[100000],
+                        help='number of client records of the synthetic tests (default: %(default)s)')
+    parser.add_argument('--loss', type=float, default=0.01,
+                        help='probability of a lost record (default: %(default)s)')
+    parser.add_argument('--reordering', type=float, default=0.01,
+                        help='probability of a record swapped with its successor (default: %(default)s)')
+    parser.add_argument('--duplicates', type=float, default=0.001,
+                        help='probability of a duplicate record (default: %(default)s)')
+    parser.add_argument('--stage', action='append', choices=benchmark_stages, metavar='STAGE',
+                        help=f'stages to benchmark (repeatable, default: all of {", ".join(benchmark_stages)})')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='repetitions of each stage, the fastest is reported (default: %(default)s)')
+    parser.add_argument('--parallel-sides', choices=('off', 'thread', 'process'), default=parallel_sides,
+                        help='parse the client and server side concurrently in the handle_test stage (default: %(default)s)')
+    parser.add_argument('--folder', metavar='FOLDER',
+                        help='folder for the synthetic tests and output (default: temporary folder, removed afterwards)')
+    parser.add_argument('--json', metavar='FILE',
+                        help='append the results as JSON lines to the given file (e.g. to track regressions)')
+    arguments = parser.parse_args(argv)
+
+    folder = arguments.folder or tempfile.mkdtemp(prefix='eparser_benchmark_')
+    stages = tuple(arguments.stage) if arguments.stage else benchmark_stages
+
+    try:
+        print(f'{"stage":<26} {"records":>10} {"seconds":>9} {"records/s":>12} {"peak RSS":>10}')
+
+        for records in arguments.records:
+            test = f'benchmark_{records}'
+            campaign_folder = os.path.join(folder, 'raw', 'benchmark')
+            generate_test(campaign_folder, 'benchmark', test, records, arguments.loss, arguments.reordering, arguments.duplicates)
+
+            job = next(job for job in eParser.__collect_scenario('benchmark', os.path.join(campaign_folder, 'client', 'benchmark'),
+                                                                os.path.join(campaign_folder, 'server', 'benchmark'),
+                                                                os.path.join(folder, 'output', 'benchmark'), [test]))
+            job.update(campaign='benchmark', manifest=None)
+
+            if not validate_scanner(job):
+                print(f'Error: The fast scanner does not match the XML parser for {test}')
+
+            for result in run_benchmark(job, stages, arguments.repeat, arguments.parallel_sides):
+                peak_rss = f'{result["peak_rss"] / 1048576:.0f} MiB' if result['peak_rss'] is not None else '-'
+                print(f'{result["stage"]:<26} {result["records"]:>10} {result["seconds"]:>9.3f} {result["records_per_second"] or 0:>12.0f} {peak_rss:>10}')
+
+                if arguments.json:
+                    append_json_line(arguments.json, dict(result, version=eparser_version, loss=arguments.loss, reordering=arguments.reordering,
+                                                          duplicates=arguments.duplicates, date=datetime.now().isoformat(timespec='seconds')))
+    finally:
+        if not arguments.folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    freeze_support()
+    main()
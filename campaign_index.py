@@ -0,0 +1,112 @@
+import os
+import csv
+from constants import latency_percentiles, campaign_index_file
+from performance_evaluation import percentile_tag
+
+# Columns of the campaign index (one row per test, the clock columns are only set with the clock correction)
+index_columns = [
+    'campaign', 'scenario', 'test', 't_uid',
+    'connection_type', 'datagram_size', 'cycle_time', 'qos', 'stress_type', 'stress_intensity', 'stress_location',
+    'duration', 'datagrams', 'bandwidth', 'partial',
+    'packet_loss', 'in_order', 'lost_packets', 'loss_ratio', 'duplicate_packets', 'reordered_packets', 'max_reorder_distance',
+    'loss_bursts', 'max_loss_burst', 'mean_loss_burst', 'samples',
+    'mean_latency', 'standard_deviation', 'minimum_latency', 'maximum_latency', 'difference_latency', 'mean_jitter',
+    'percentile_method'
+] + [percentile_tag(percentile) for percentile in latency_percentiles] + [
+    'clock_offset', 'clock_drift', 'clock_windows',
+    'corrected_mean_latency', 'corrected_standard_deviation', 'corrected_minimum_latency', 'corrected_maximum_latency',
+    'corrected_difference_latency', 'corrected_mean_jitter'
+] + ['corrected_' + percentile_tag(percentile) for percentile in latency_percentiles]
+
+def get_index_path(folder: str) -> str:
+    '''
+    Returns the path of the index of the campaign with the given output folder.
+    '''
+    return os.path.join(folder, campaign_index_file)
+
+def prepare_index(folder: str) -> None:
+    '''
+    Prepares the index of a campaign for appending rows: an index of a previous execution with other
+    columns (e.g. of an older eParser version) is rewritten with the current columns.
+
+            Parameters:
+                    folder (str): Path to the output folder of the campaign
+    '''
+    index_path = get_index_path(folder)
+    if not os.path.isfile(index_path):
+        return
+
+    with open(index_path, 'r', newline='', encoding='utf-8') as file:
+        header = next(csv.reader(file), None)
+
+    if header != index_columns:
+        __write_index(index_path, load_index(folder))
+
+def append_index_row(folder: str, row: dict) -> None:
+    '''
+    Appends the row of a test to the index of the campaign (CSV file with the header index_columns).
+    Rows are written as soon as a test is finished; rows of tests processed again replace their
+    earlier rows when the index is compacted (see compact_index).
+
+            Parameters:
+                    folder (str): Path to the output folder of the campaign
+                    row (dict): Values of the test (missing columns stay empty)
+    '''
+    index_path = get_index_path(folder)
+    new_file = not os.path.isfile(index_path)
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    with open(index_path, 'a', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=index_columns, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+
+def load_index(folder: str) -> list:
+    '''
+    Loads the index of a campaign. If a test is contained multiple times, only its last row is used.
+
+            Parameters:
+                    folder (str): Path to the output folder of the campaign
+
+            Returns:
+                    rows (list): List of dictionaries (one per test, values as text)
+    '''
+    index_path = get_index_path(folder)
+    if not os.path.isfile(index_path):
+        return list()
+
+    rows = dict()
+    with open(index_path, 'r', newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            rows[(row['campaign'], row['scenario'], row['test'])] = row
+
+    return list(rows.values())
+
+def compact_index(folder: str) -> None:
+    '''
+    Rewrites the index of a campaign with one row per test, sorted by scenario and test.
+
+            Parameters:
+                    folder (str): Path to the output folder of the campaign
+    '''
+    index_path = get_index_path(folder)
+    if not os.path.isfile(index_path):
+        return
+
+    rows = sorted(load_index(folder), key=lambda row: (row['scenario'], row['test']))
+    __write_index(index_path, rows)
+
+def __write_index(index_path: str, rows: list) -> None:
+    '''
+    Writes the given rows as index (replaces the file atomically).
+    '''
+    temporary_path = index_path + '.tmp'
+    with open(temporary_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=index_columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+    os.replace(temporary_path, index_path)
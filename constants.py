@@ -8,9 +8,58 @@ raw_folder = 'results/performance/raw'
 test_description_file = 'test_description.xml'
 test_results_file = 'test_results.xml'
 
+# VERSION (stored in the manifest, increase if the output of the evaluation changes)
+eparser_version = '2.7'
+manifest_file = 'manifest.jsonl'
+
+# JOURNAL NAMES (checkpoint journal of the started and completed tests, structured errors of the
+# failed tests, both JSON lines)
+journal_file = 'journal.jsonl'
+failures_file = 'failures.jsonl'
+
+# PROFILE NAMES (per-stage duration and memory of each test with --profile, JSON lines)
+profile_file = 'profile.jsonl'
+
+# INDEX NAMES (one row per test in the output folder of each campaign)
+campaign_index_file = 'index.csv'
+
+# RESULTS DATABASE (SQLite file with the summaries of all executions, None to disable)
+results_database_file = None
+
+# RECOVERY OPTIONS (evaluate truncated test results files up to the truncation, the test is marked
+# as partial in the performance.xml)
+recover_truncated_results = True
+
+# PARSER OPTIONS (read the timestamp records with the fast scanner if the test results file has the
+# TestSuite record layout, otherwise with the XML parser)
+fast_timestamp_scanner = True
+
 # XML OUTPUT OPTIONS
 create_timediff_xml = False
 
+# PERCENTILE OPTIONS (latency percentiles in the performance.xml, exact up to the given number of
+# samples and from the quantile sketch above, relative accuracy of the sketch)
+latency_percentiles = (50, 90, 99, 99.9, 99.99)
+percentile_exact_limit = 50000000
+sketch_relative_accuracy = 0.001
+
+# BINARY OUTPUT OPTIONS (timediff.npy, NumPy file with the fields 'sequence' and 'difference')
+create_timediff_npy = False
+
+# AGGREGATE OPTIONS (latency_aggregates.npz next to the performance.xml: latency histogram with the
+# given bin width in µs and min/max/mean envelope of the latency over the given number of windows).
+# The histogram has at most the given number of bins: beyond that, it only covers the given
+# percentile range (outliers are counted as underflow/overflow), and if necessary wider bins are used
+histogram_bin_width = 1.0
+histogram_max_bins = 1000000
+histogram_clip_percentiles = (0.01, 99.99)
+envelope_windows = 2000
+
+# CLOCK CORRECTION OPTIONS (fit the drift between the client and server clock to the minimum latency of
+# the given number of windows and remove it from the latencies, see performance_evaluation.correct_clock_drift)
+clock_correction = False
+clock_correction_windows = 100
+
 # EXECUTION OPTIONS
 def os_name():
     if os.name == 'nt':
@@ -23,10 +72,21 @@ def os_name():
         
     return 'unknown'
 
-def concurrent_execution():
-    if os_name() == 'Linux':
-        return True
-    else:
-        return False
+def concurrent_execution(workers: int = None):
+    if workers is None:
+        workers = max_worker
+
+    return workers > 1
+
+max_worker = os.cpu_count() or 1
+
+# Interval of the progress output in seconds (with --progress)
+progress_interval = 5
+show_progress = True
+
+# Parse the client and server side of each test concurrently ('off', 'thread' or 'process')
+parallel_sides = 'off'
 
-max_worker = 5
+# Start method of the worker processes ('fork', 'spawn', 'forkserver' or None for the default of
+# the platform, which is 'spawn' on macOS and Windows)
+start_method = None
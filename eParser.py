@@ -1,83 +1,361 @@
 # NOTE: This is the eParser for performance tests. For the reliability tests, use an older commit.
 
 import os
+import re
+import argparse
+from fnmatch import fnmatch
 from datetime import datetime
-from constants import output_folder, raw_folder, os_name, concurrent_execution, max_worker
-from parsing import parse_description_file, parse_result_file, parse_timestamp_messages
-from file_management import validate_test_folder, check_server_data
-from performance_evaluation import evaluate_performance
-from multiprocessing import Process
-
-
-
-parent_folder = os.path.dirname(os.path.dirname((os.path.abspath(__file__))))
-
-# Output folder for the current execution
-commit_hash   = os.popen('git rev-parse HEAD').read().strip()[:7]
-timestamp     = datetime.now().strftime('%y%m%d_%H%M%S')
-operating_sys = os_name()
-output_folder = os.path.join(parent_folder, output_folder, f'{timestamp}_{commit_hash}_{operating_sys}')
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
-
-# Raw folder for the current execution
-result_folder = os.path.join(parent_folder, raw_folder)
-if not os.path.exists(result_folder):
-    exit(1)
-
-
-
-def __handle_scenario(name :str, client_path: str, server_path: str, output_path: str) -> None:
-    # Print start message
-    print(f'Starting eParser for scenario {name}... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+from constants import output_folder, raw_folder, os_name, concurrent_execution, max_worker, start_method, create_timediff_xml, create_timediff_npy, eparser_version, results_database_file, histogram_bin_width, envelope_windows, clock_correction, profile_file, progress_interval, show_progress, recover_truncated_results, fast_timestamp_scanner, parallel_sides
+from parsing import parse_description_file, parse_test_results
+from file_management import validate_test_folder, check_server_data, get_test_size, is_folder, list_folder, get_compressed_archive
+from performance_evaluation import evaluate_performance, evaluate_campaign
+from campaign_index import prepare_index, append_index_row, compact_index
+from results_database import open_database, store_run, store_test
+from instrumentation import create_profile, measure_stage, finish_profile, append_profile, summarize_profiles, print_profile_summary
+from progress import create_progress, report_event, collect_events, complete_test, reset_running, print_progress
+from journal import start_journal, append_journal, load_interrupted, capture_error, append_failure, print_failures
+from manifest import load_manifest, append_manifest, get_test_key, get_test_inputs, create_manifest_entry, is_up_to_date
+from queue import SimpleQueue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import freeze_support, get_context
+
+
+
+def __match_filters(name: str, patterns: list) -> bool:
+    '''
+    Checks if the given name matches one of the given patterns. Patterns are shell-style wildcards
+    (e.g. '04_*_A'), patterns starting with 're:' are regular expressions (e.g. 're:^04_[13]_').
+
+            Parameters:
+                    name (str): Name of the campaign, scenario or test
+                    patterns (list): List of patterns (no patterns match everything)
+
+            Returns:
+                    result (bool): True if the name matches one of the patterns, False otherwise
+    '''
+    if not patterns:
+        return True
+
+    for pattern in patterns:
+        if pattern.startswith('re:'):
+            if re.search(pattern[3:], name):
+                return True
+        elif fnmatch(name, pattern):
+            return True
+
+    return False
+
+def __skip_entry(name: str) -> bool:
+    '''
+    Checks if the given campaign or scenario folder has to be skipped (hidden or marked with '_N').
+    Archived folders are listed without the suffix of the archive (see file_management.list_folder).
+    '''
+    return name.endswith('_N') or name.startswith('.')
+
+def __collect_scenario(name :str, client_path: str, server_path: str, output_path: str, test_filters: list = None) -> list:
+    '''
+    Collects the tests of the given scenario and creates the output folder of the scenario. A scenario
+    or test that cannot be read (7z archive without py7zr, or an archive without the expected
+    folders) is skipped with a warning.
+
+            Parameters:
+                    name (str): Name of the scenario
+                    client_path (str): Path to the client folder of the scenario
+                    server_path (str): Path to the server folder of the scenario
+                    output_path (str): Path to the output folder of the campaign
+                    test_filters (list): Patterns for the test folders to process (see __match_filters)
+
+            Returns:
+                    jobs (list): List of dictionaries (one per test) containing the following keys:
+                                 'campaign', 'scenario', 'test_folder', 'client_path',
+                                 'server_path', 'output_path', 'size'
+    '''
+    try:
+        test_folders = list_folder(client_path)
+    except (ModuleNotFoundError, FileNotFoundError) as error:
+        print(f'Warning: Skipping scenario {name} ({error})')
+        return list()
 
     # Create campaign folder for the output
     campaign_folder = os.path.join(output_path, name)
     if not os.path.exists(campaign_folder):
         os.makedirs(campaign_folder)
 
+    jobs = list()
+    for test_folder in test_folders:
+        if not __match_filters(test_folder, test_filters):
+            continue
 
-    # List of tuples containing the following data for each test scenario:
-    #   - description:    dict
-    #   - client_results: dict
-    #   - server_results: dict
-    #   - client_timestamps: list (of dicts)
-    #   - server_timestamps: list (of dicts)
-
-    # Parse all test scenarios and store the data in the list
-    if concurrent_execution():
-        processes_test = list()
-        processes_number = 0
-
-        for test_folder in os.listdir(client_path):
-            if processes_number >= max_worker:
-                for process in processes_test:
-                    processes_number -= 1
-                    process.join()
-
-            processes_number += 1
-            process = Process(target=__handle_test, args=(test_folder, client_path, server_path, campaign_folder))
-            process.start()
-            processes_test.append(process)
-
-        for process in processes_test:
-            process.join()
-
-    else:
-        for test_folder in os.listdir(client_path):
-            __handle_test(test_folder, client_path, server_path, campaign_folder)    
+        try:
+            size = get_test_size(client_path, server_path, test_folder)
+        except (ModuleNotFoundError, FileNotFoundError) as error:
+            print(f'Warning: Skipping test {name}/{test_folder} ({error})')
+            continue
 
-    print(f'Finished eParser for scenario {name}... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+        jobs.append({
+            'campaign': os.path.basename(output_path),
+            'scenario': name,
+            'test_folder': test_folder,
+            'client_path': client_path,
+            'server_path': server_path,
+            'output_path': campaign_folder,
+            'size': size
+        })
+
+    return jobs
+
+def __handle_jobs(jobs: list, options: dict) -> bool:
+    '''
+    Processes the given tests. The tests of all scenarios and campaigns are scheduled together, the
+    largest tests (by size of the result files) first, so the last running tests are the short ones.
+    In the concurrent execution, a pool of worker processes is kept busy until all tests are
+    processed.
+
+            Parameters:
+                    jobs (list): List of tests (see __collect_scenario)
+                    options (dict): Options of the execution (see main)
+
+            Returns:
+                    result (bool): False if the execution was interrupted (Ctrl-C), True otherwise
+    '''
+    jobs = sorted(jobs, key=lambda job: job['size'], reverse=True)
+
+    # Number of unfinished tests per scenario (for the finish message)
+    remaining = dict()
+    for job in jobs:
+        scenario = (job['campaign'], job['scenario'])
+        remaining[scenario] = remaining.get(scenario, 0) + 1
+
+    skipped = 0
+    campaign_tests = dict()
+    profiles = list()
+    progress = create_progress(jobs) if options['progress'] else None
+
+    # Results database (only written by this process)
+    database = None
+    if options['database']:
+        database = open_database(options['database'])
+        run_id = store_run(database, os.path.basename(os.path.normpath(options['execution_folder'])), options['version'], os_name())
+
+    failures = list()
+    interrupted_tests = start_journal(options['execution_folder'])
+    if interrupted_tests:
+        print(f'Warning: {len(interrupted_tests)} tests were interrupted in the previous execution (e.g. crash or out of memory): {", ".join(sorted(interrupted_tests))}')
+
+    def finish(job, result):
+        nonlocal skipped
+        complete_test(progress, job, result['status'])
+        append_journal(options['execution_folder'], job, result['status'])
+
+        if result['status'] == 'failed':
+            print(f'Error: Processing test {job["test_folder"]} failed: {result["error"]["type"]}: {result["error"]["message"]}')
+            append_failure(options['execution_folder'], result['error'])
+            failures.append(result['error'])
+        if result['entry'] is not None and result['entry'] != job['manifest']:
+            append_manifest(options['execution_folder'], result['entry'])
+        if result['entry'] is not None:
+            campaign_folder = os.path.join(options['execution_folder'], job['campaign'])
+            if job['campaign'] not in campaign_tests:
+                prepare_index(campaign_folder)
+            campaign_tests.setdefault(job['campaign'], list()).append(os.path.join(options['execution_folder'], result['entry']['output']))
+            if result['entry']['summary'] is not None:
+                append_index_row(campaign_folder, result['entry']['summary'])
+                if database is not None:
+                    store_test(database, run_id, result['entry']['summary'], result['entry']['output'])
+        if result['status'] == 'skipped':
+            skipped += 1
+        if result.get('profile') is not None:
+            append_profile(options['execution_folder'], result['profile'])
+            profiles.append(result['profile'])
+
+        scenario = (job['campaign'], job['scenario'])
+        remaining[scenario] -= 1
+        if remaining[scenario] == 0:
+            print(f'Finished eParser for scenario {job["campaign"]}/{job["scenario"]}... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+
+    interrupted = False
+    try:
+        if concurrent_execution(options['workers']):
+            # The progress events of the workers are sent through a queue of a manager process
+            manager = get_context(start_method).Manager() if progress is not None else None
+            queue = manager.Queue() if manager is not None else None
+
+            try:
+                # A pool is broken if a worker process is terminated (e.g. killed when out of memory). The
+                # tests running at that time are processed again, each in its own pool, so only the test
+                # that terminates its worker again fails. All other tests are processed by a new pool.
+                pending_jobs = jobs
+                while pending_jobs:
+                    pending_jobs, suspects = __handle_pool(pending_jobs, options['workers'], options, queue, progress, finish)
+                    if pending_jobs or suspects:
+                        reset_running(progress)
+
+                    for job in suspects:
+                        for _ in __handle_pool([job], 1, options, queue, progress, finish)[1]:
+                            error = BrokenProcessPool('The worker process was terminated while processing the test (e.g. out of memory)')
+                            finish(job, {'status': 'failed', 'entry': None, 'error': capture_error(job, error)})
+            finally:
+                if manager is not None:
+                    manager.shutdown()
+
+        else:
+            queue = SimpleQueue() if progress is not None else None
+            for job in jobs:
+                result = __run_test(job, options, queue)
+                collect_events(progress, queue)
+                finish(job, result)
+                print_progress(progress)
+
+    except KeyboardInterrupt:
+        interrupted = True
+        print('Interrupted: the remaining tests are not processed')
+
+    print_progress(progress, force=True)
+
+    if skipped:
+        print(f'Skipped {skipped} tests (output is up to date)')
+
+    if profiles:
+        print_profile_summary(summarize_profiles(profiles))
+
+    print_failures(failures, options['execution_folder'])
+
+    # Campaign-level latency summary (from the quantile sketches of the tests) and index
+    for campaign, test_folders in campaign_tests.items():
+        evaluate_campaign(test_folders, os.path.join(options['execution_folder'], campaign))
+        compact_index(os.path.join(options['execution_folder'], campaign))
+
+    if database is not None:
+        database.close()
+
+    if interrupted or failures:
+        print(f'Resume (only unfinished and failed tests) with: --incremental {os.path.basename(os.path.normpath(options["execution_folder"]))}')
+
+    return not interrupted
+
+def __handle_pool(jobs: list, workers: int, options: dict, queue, progress: dict, finish) -> tuple:
+    '''
+    Processes the given tests with a pool of worker processes.
+
+    If a worker process is terminated (e.g. killed when out of memory), the pool is broken and all of
+    its unfinished tests fail with BrokenProcessPool. These tests are returned instead of being
+    completed: the tests that were running at that time (started but not completed according to the
+    checkpoint journal) as suspects, all others to be processed by a new pool.
+
+            Parameters:
+                    jobs (list): List of tests (see __collect_scenario)
+                    workers (int): Number of worker processes
+                    options (dict): Options of the execution (see main)
+                    queue (Queue): Queue for the progress events or None
+                    progress (dict): Progress of the execution or None
+                    finish (function): Function called with the test and the result of each completed test
+
+            Returns:
+                    jobs (list): Tests that were not started (empty if the pool did not break)
+                    suspects (list): Tests that were running when the pool broke
+    '''
+    broken = list()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context(start_method)) as executor:
+        futures = dict()
+        for job in jobs:
+            future = executor.submit(__run_test, job, options, queue)
+            futures[future] = job
+
+        try:
+            # Wait for the tests with a timeout, so the progress is also printed while long tests are running
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=progress_interval if progress is not None else None, return_when=FIRST_COMPLETED)
+                collect_events(progress, queue)
+
+                for future in done:
+                    job = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken.append(job)
+                        continue
+                    except Exception as error:
+                        result = {'status': 'failed', 'entry': None, 'error': capture_error(job, error)}
+                    finish(job, result)
+
+                print_progress(progress)
+
+        except KeyboardInterrupt:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    running = load_interrupted(options['execution_folder'])
+    suspects = [job for job in broken if get_test_key(job) in running]
+    if not suspects:
+        return list(), broken   # the running tests cannot be determined
+
+    return [job for job in broken if get_test_key(job) not in running], suspects
+
+def __run_test(job: dict, options: dict, queue = None) -> dict:
+    '''
+    Processes a single test (worker function of the process pool) and captures every error, so a
+    corrupt or truncated test only fails itself and not the whole execution.
+
+            Parameters:
+                    job (dict): The test (see __collect_scenario)
+                    options (dict): Options of the execution (see main)
+                    queue (Queue): Queue for the progress events (see progress.report_event) or None
+
+            Returns:
+                    result (dict): Result of the test (see __handle_test), for a failed test a
+                                   dictionary containing the keys 'status' ('failed'), 'entry'
+                                   (None) and 'error' (see journal.capture_error)
+    '''
+    append_journal(options['execution_folder'], job, 'started')
+    try:
+        return __handle_test(job, options, queue)
+    except Exception as error:
+        return {'status': 'failed', 'entry': None, 'error': capture_error(job, error)}
+
+def __handle_test(job: dict, options: dict, queue = None) -> dict:
+    '''
+    Processes a single test (worker function of the process pool).
+
+            Parameters:
+                    job (dict): The test (see __collect_scenario)
+                    options (dict): Options of the execution (see main)
+                    queue (Queue): Queue for the progress events (see progress.report_event) or None
+
+            Returns:
+                    result (dict): Dictionary containing the following keys: 'status' ('processed',
+                                   'skipped' or 'invalid'), 'entry' (manifest entry of the test),
+                                   'profile' (see instrumentation.create_profile, only with the
+                                   'profile' option for processed tests)
+    '''
+    test_folder = job['test_folder']
+    client_path = job['client_path']
+    server_path = job['server_path']
+    output_path = job['output_path']
+
+    report_event(queue, 'started')
 
-def __handle_test(test_folder: str, client_path: str, server_path: str, output_path: str):
     test_folder_client = os.path.join(client_path, test_folder)
-    if not os.path.isdir(test_folder_client):
-        return
+    if not is_folder(test_folder_client):
+        return {'status': 'invalid', 'entry': None}
 
     # Check if test folder is valid (contains test_description.xml and test_results.xml)
     if not validate_test_folder(test_folder_client):
-        return
-    print(f'Processing test {test_folder}... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+        return {'status': 'invalid', 'entry': None}
+
+    # Skip the test if the output of a previous execution is up to date (incremental execution)
+    previous = job['manifest']
+    inputs = get_test_inputs(job, options['hash'], previous['inputs'] if previous else None)
+    if options['incremental'] and is_up_to_date(previous, options, inputs, options['execution_folder']):
+        if not options['progress']:
+            print(f'Skipping test {test_folder} (up to date)')
+        return {'status': 'skipped', 'entry': create_manifest_entry(job, options, inputs, previous['output'], previous.get('summary'))}
+
+    if not options['progress']:
+        print(f'Processing test {test_folder}... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+    profile = create_profile(job) if options['profile'] else None
 
     # Check if server data exists
     server_data = check_server_data(server_path, test_folder)
@@ -85,25 +363,38 @@ def __handle_test(test_folder: str, client_path: str, server_path: str, output_p
         test_folder_server = os.path.join(server_path, test_folder)
 
     # Parse the test description file
-    description = parse_description_file(test_folder_client)
-
-    # Parse the test results files
-    client_results = parse_result_file(test_folder_client)
-    if server_data:
-        server_results = parse_result_file(test_folder_server)
-    else:
-        server_results = None
-
-    # Parse the query messages
-    client_timestamps = parse_timestamp_messages(test_folder_client)
-    if server_data:
-        server_timestamps = parse_timestamp_messages(test_folder_server)
+    with measure_stage(profile, 'parse_description'):
+        description = parse_description_file(test_folder_client)
+
+    # Parse the test results files (results and timestamp messages in a single pass)
+    if server_data and options['parallel_sides'] != 'off':
+        # Client and server side concurrently (the server side in a thread or a separate process)
+        with measure_stage(profile, 'parse_sides') as stage:
+            (client_results, client_timestamps), (server_results, server_timestamps) = __parse_sides(test_folder_client, test_folder_server, options)
+            stage['records'] = sum(len(timestamps) for timestamps in (client_timestamps, server_timestamps) if timestamps is not None)
     else:
-        server_timestamps = None
+        with measure_stage(profile, 'parse_client') as stage:
+            client_results, client_timestamps = parse_test_results(test_folder_client, columnar=True, recover=options['recover'], fast=options['fast_scan'])
+            stage['records'] = len(client_timestamps) if client_timestamps is not None else 0
+        if server_data:
+            with measure_stage(profile, 'parse_server') as stage:
+                server_results, server_timestamps = parse_test_results(test_folder_server, columnar=True, recover=options['recover'], fast=options['fast_scan'])
+                stage['records'] = len(server_timestamps) if server_timestamps is not None else 0
+        else:
+            server_results = None
+            server_timestamps = None
+
+    for side, results in (('client', client_results), ('server', server_results)):
+        if results is not None and 'partial' in results:
+            print(f'Warning: The {side} results of test {test_folder} are truncated ({results["partial"]}), the test is evaluated as partial')
+
+    report_event(queue, 'records', sum(len(timestamps) for timestamps in (client_timestamps, server_timestamps) if timestamps is not None))
 
     test = (description, client_results, server_results, client_timestamps, server_timestamps)
     output_folder = os.path.join(output_path, test[0]['metadata']['t_uid'])
-    evaluate_performance(test, output_folder)
+    summary = evaluate_performance(test, output_folder, create_timediff=options['timediff'], create_timediff_binary=options['timediff_npy'],
+                                   bin_width=options['histogram_bin_width'], windows=options['envelope_windows'],
+                                   correct_clock=options['clock_correction'], profile=profile)
 
     # Delete everything
     del description
@@ -113,57 +404,218 @@ def __handle_test(test_folder: str, client_path: str, server_path: str, output_p
     del server_timestamps
     del test
 
-# Ask for the campaigns to process
-campaign_list = list()
-for test_campaign in os.listdir(result_folder):
-    if test_campaign.endswith('_N') or test_campaign.startswith('.') or test_campaign.endswith('.7z'):
-        continue
-
-    print(f'Process campaign {test_campaign}? (y/n)')
-    answer = input().lower()
-
-    if 'y' in answer:
-        campaign_list.append(test_campaign)
-    if 'a' in answer:
-        break
-
-# Process the selected campaigns
-for test_campaign in campaign_list:
-    # The folder is structured as follows:
-    #   - raw_folder
-    #       - campaign (e.g. 04_1_Base_A)
-    #           - client
-    #               - test_scenario (e.g. ihwk_A1_092400_111223)
-    #                   - test (e.g. 092400_111223_1_80)
-    #                       - test_description.xml
-    #                       - test_results.xml
-    #                   - ...
-    #               - ...
-    #           - server
-    #               - test_scenario (e.g. ihwk_A1_092400_111223)
-    #                   - test (e.g. 092400_111223_1_80)
-    #                       - test_description.xml
-    #                       - test_results.xml
-    #                   - ...
-    #               - ...
-    #       - ...
-
-
-    # Get the client and server folder for the current campaign
-    test_campaign_client = os.path.join(result_folder, test_campaign, 'client')
-    test_campaign_server = os.path.join(result_folder, test_campaign, 'server')
-
-    # Get the output folder for the current campaign
-    test_campaign_output = os.path.join(output_folder, test_campaign)
-    
-
-    # Get the test scenarios for the current campaign
-    for test_scenario in os.listdir(test_campaign_client):
-        # Skip files
-        if test_scenario.endswith('_N') or test_scenario.startswith('.') or test_scenario.endswith('.7z'):
+    # Only tests with a performance.xml are complete (e.g. no timestamps available)
+    entry = None
+    if os.path.isfile(os.path.join(output_folder, 'performance.xml')):
+        if summary is not None:
+            summary = dict(campaign=job['campaign'], scenario=job['scenario'], test=test_folder, **summary)
+        entry = create_manifest_entry(job, options, inputs, os.path.relpath(output_folder, options['execution_folder']), summary)
+
+    return {'status': 'processed', 'entry': entry, 'profile': finish_profile(profile)}
+
+def __parse_sides(test_folder_client: str, test_folder_server: str, options: dict) -> tuple:
+    '''
+    Parses the client and server test results files of a test concurrently: the server side in a
+    thread ('thread', mainly overlaps the reading of the files) or in a separate process ('process',
+    the parsing itself runs in parallel) while the current process parses the client side. This
+    shortens the wall time of very large tests if there are fewer tests than worker processes.
+
+            Parameters:
+                    test_folder_client (str): Path to the client test folder
+                    test_folder_server (str): Path to the server test folder
+                    options (dict): Options of the execution (see main)
+
+            Returns:
+                    client (tuple): Results and timestamp messages of the client (see parsing.parse_test_results)
+                    server (tuple): Results and timestamp messages of the server
+    '''
+    if options['parallel_sides'] == 'process':
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=get_context(start_method))
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+
+    with executor:
+        server = executor.submit(parse_test_results, test_folder_server, columnar=True, recover=options['recover'], fast=options['fast_scan'])
+        client = parse_test_results(test_folder_client, columnar=True, recover=options['recover'], fast=options['fast_scan'])
+        return client, server.result()
+
+def main(argv: list = None) -> None:
+    '''
+    Entry point of the eParser. All work (including the creation of the output folder and the
+    selection of the campaigns) happens here and not at import time, so the module can be imported
+    by the worker processes of the spawn start method (macOS, Windows).
+
+    Without campaign filters, the campaigns to process are selected interactively (y/n). With at
+    least one --campaign filter, the eParser runs without any user interaction.
+
+            Parameters:
+                    argv (list): Command line arguments (default: sys.argv)
+    '''
+    parent_folder = os.path.dirname(os.path.dirname((os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description='eParser for the performance tests of the TestSuite.')
+    parser.add_argument('--raw', default=os.path.join(parent_folder, raw_folder),
+                        help='root folder containing the raw campaigns (default: %(default)s)')
+    parser.add_argument('--output', default=os.path.join(parent_folder, output_folder),
+                        help='root folder for the output of the executions (default: %(default)s)')
+    parser.add_argument('--campaign', action='append', default=list(), metavar='PATTERN',
+                        help='campaigns to process (wildcard or re:REGEX, repeatable); without this option the campaigns are selected interactively')
+    parser.add_argument('--scenario', action='append', default=list(), metavar='PATTERN',
+                        help='scenarios to process (wildcard or re:REGEX, repeatable)')
+    parser.add_argument('--test', action='append', default=list(), metavar='PATTERN',
+                        help='tests to process (wildcard or re:REGEX, repeatable)')
+    parser.add_argument('--workers', type=int, default=max_worker,
+                        help='number of worker processes, 1 for a serial execution (default: %(default)s)')
+    parser.add_argument('--timediff', action=argparse.BooleanOptionalAction, default=create_timediff_xml,
+                        help='create the timediff.xml file for each test (default: %(default)s)')
+    parser.add_argument('--timediff-npy', action=argparse.BooleanOptionalAction, default=create_timediff_npy,
+                        help='create the binary timediff.npy file for each test (default: %(default)s)')
+    parser.add_argument('--recover', action=argparse.BooleanOptionalAction, default=recover_truncated_results,
+                        help='evaluate truncated test results files up to the truncation and mark the test as partial (default: %(default)s)')
+    parser.add_argument('--parallel-sides', choices=('off', 'thread', 'process'), default=parallel_sides,
+                        help='parse the client and server side of each test concurrently in a thread or a separate process, useful for few very large tests (default: %(default)s)')
+    parser.add_argument('--fast-scan', action=argparse.BooleanOptionalAction, default=fast_timestamp_scanner,
+                        help='read the timestamp records with the fast scanner if the layout allows it (default: %(default)s)')
+    parser.add_argument('--bin-width', type=float, default=histogram_bin_width, metavar='US',
+                        help='bin width of the latency histogram in µs (default: %(default)s)')
+    parser.add_argument('--clock-correction', action=argparse.BooleanOptionalAction, default=clock_correction,
+                        help='remove the drift between the client and server clock from the latencies and report the raw and corrected statistics (default: %(default)s)')
+    parser.add_argument('--incremental', nargs='?', const='incremental', metavar='FOLDER',
+                        help='write into the given output folder (default: incremental) instead of a new one and skip all tests whose output is up to date')
+    parser.add_argument('--database', default=results_database_file, metavar='FILE',
+                        help='store the results in the given SQLite database (default: %(default)s)')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'record the duration, records and peak memory of each processing stage in {profile_file} and print a summary per campaign')
+    parser.add_argument('--progress', action=argparse.BooleanOptionalAction, default=show_progress,
+                        help=f'print the number of finished tests, records per second and ETA every {progress_interval} s instead of a line per test (default: %(default)s)')
+    parser.add_argument('--hash', action='store_true',
+                        help='compare the content (SHA-256) of input files with a new modification time in the incremental execution')
+    arguments = parser.parse_args(argv)
+
+    # Raw folder for the current execution
+    result_folder = arguments.raw
+    if not is_folder(result_folder):
+        print(f'Error: Raw folder {result_folder} does not exist!')
+        exit(1)
+
+    # Output folder for the current execution (reused in the incremental execution)
+    commit_hash   = os.popen('git rev-parse HEAD').read().strip()[:7]
+    timestamp     = datetime.now().strftime('%y%m%d_%H%M%S')
+    operating_sys = os_name()
+    if arguments.incremental:
+        execution_folder = os.path.join(arguments.output, arguments.incremental)
+    else:
+        execution_folder = os.path.join(arguments.output, f'{timestamp}_{commit_hash}_{operating_sys}')
+    if not os.path.exists(execution_folder):
+        os.makedirs(execution_folder)
+
+    options = {
+        'version': f'{eparser_version}+{commit_hash}' if commit_hash else eparser_version,
+        'workers': max(arguments.workers, 1),
+        'incremental': arguments.incremental is not None,
+        'hash': arguments.hash,
+        'execution_folder': execution_folder,
+        'database': os.path.abspath(arguments.database) if arguments.database else None,
+        'profile': arguments.profile,
+        'progress': arguments.progress,
+        'fast_scan': arguments.fast_scan,
+        'parallel_sides': arguments.parallel_sides,
+        'timediff': arguments.timediff,
+        'timediff_npy': arguments.timediff_npy,
+        'recover': arguments.recover,
+        'histogram_bin_width': arguments.bin_width,
+        'envelope_windows': envelope_windows,
+        'clock_correction': arguments.clock_correction
+    }
+    manifest = load_manifest(execution_folder)
+
+
+    # Select the campaigns to process (ask if no filter is given)
+    campaign_list = list()
+    for test_campaign in sorted(list_folder(result_folder)):
+        if __skip_entry(test_campaign):
+            continue
+
+        if arguments.campaign:
+            if __match_filters(test_campaign, arguments.campaign):
+                campaign_list.append(test_campaign)
             continue
 
-        test_scenario_client = os.path.join(test_campaign_client, test_scenario)
-        test_scenario_server = os.path.join(test_campaign_server, test_scenario)
-        
-        __handle_scenario(test_scenario, test_scenario_client, test_scenario_server, test_campaign_output)
+        print(f'Process campaign {test_campaign}? (y/n)')
+        answer = input().lower()
+
+        if 'y' in answer:
+            campaign_list.append(test_campaign)
+        if 'a' in answer:
+            break
+
+    # Collect the tests of the selected campaigns
+    jobs = list()
+    for test_campaign in campaign_list:
+        # The folder is structured as follows:
+        #   - raw_folder
+        #       - campaign (e.g. 04_1_Base_A)
+        #           - client
+        #               - test_scenario (e.g. ihwk_A1_092400_111223)
+        #                   - test (e.g. 092400_111223_1_80)
+        #                       - test_description.xml
+        #                       - test_results.xml
+        #                   - ...
+        #               - ...
+        #           - server
+        #               - test_scenario (e.g. ihwk_A1_092400_111223)
+        #                   - test (e.g. 092400_111223_1_80)
+        #                       - test_description.xml
+        #                       - test_results.xml
+        #                   - ...
+        #               - ...
+        #       - ...
+        #
+        # Campaigns, scenarios and tests can also be archives (e.g. 04_1_Base_A.7z) and the files can
+        # be compressed (e.g. test_results.xml.gz), see file_management.
+
+
+        # Get the client and server folder for the current campaign
+        test_campaign_client = os.path.join(result_folder, test_campaign, 'client')
+        test_campaign_server = os.path.join(result_folder, test_campaign, 'server')
+
+        # Get the output folder for the current campaign
+        test_campaign_output = os.path.join(execution_folder, test_campaign)
+
+
+        # Get the test scenarios for the current campaign
+        try:
+            test_scenarios = sorted(list_folder(test_campaign_client))
+        except (ModuleNotFoundError, FileNotFoundError) as error:
+            print(f'Warning: Skipping campaign {test_campaign} ({error})')
+            continue
+
+        for test_scenario in test_scenarios:
+            # Skip files
+            if __skip_entry(test_scenario) or not __match_filters(test_scenario, arguments.scenario):
+                continue
+
+            test_scenario_client = os.path.join(test_campaign_client, test_scenario)
+            test_scenario_server = os.path.join(test_campaign_server, test_scenario)
+
+            jobs.extend(__collect_scenario(test_scenario, test_scenario_client, test_scenario_server, test_campaign_output, arguments.test))
+
+    # Compressed tar archives are decompressed from the start for every member that is read
+    for archive in sorted({get_compressed_archive(os.path.join(job[path], job['test_folder'])) for job in jobs for path in ('client_path', 'server_path')} - {None}):
+        print(f'Warning: {archive} is a compressed tar archive, every result file is decompressed from the start of the archive '
+              f'(slow for large archives, decompress it to a .tar file or use a zip archive)')
+
+    # Previous manifest entry of each test (for the incremental execution)
+    for job in jobs:
+        job['manifest'] = manifest.get(get_test_key(job))
+
+    # Process the tests of all selected campaigns
+    print(f'Starting eParser for {len(jobs)} tests... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+    if not __handle_jobs(jobs, options):
+        exit(130)
+    print(f'Finished eParser... (at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")})')
+
+
+if __name__ == '__main__':
+    freeze_support()
+    main()
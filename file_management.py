@@ -1,6 +1,31 @@
 import os
+import bz2
+import gzip
+import lzma
+import tarfile
+import zipfile
+from contextlib import contextmanager
 from constants import test_results_file
 
+try:
+    import py7zr
+except ImportError:
+    py7zr = None        # optional, 7z archives cannot be read without it
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None    # optional, zst files cannot be read without it
+
+# Archives that are read like folders (e.g. the campaign 04_1_Base_A.7z) and compressed files (e.g.
+# test_results.xml.gz). The suffix is omitted in the (virtual) paths: the campaign is read from
+# raw/04_1_Base_A/client/..., the results of a test from .../092400_111223_1_80/test_results.xml.
+archive_suffixes = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2', '.tbz2', '.7z')
+compression_suffixes = ('.gz', '.xz', '.bz2', '.zst')
+
+# Index of each opened archive (see __load_archive), per process
+__archives = dict()
+
 def validate_test_folder(path: str) -> bool:
     '''
     Checks if the given path contains the test description and test result files.
@@ -12,8 +37,7 @@ def validate_test_folder(path: str) -> bool:
                     result (bool): True if the folder contains the test description and test result
                                    files, False otherwise
     '''
-    files_in_path = os.listdir(path)
-    return test_results_file in files_in_path
+    return is_file(os.path.join(path, test_results_file))
 
 def check_server_data(server_folder: str, test_folder: str) -> bool:
     '''
@@ -28,8 +52,339 @@ def check_server_data(server_folder: str, test_folder: str) -> bool:
                                    False otherwise
     '''
     test_folder_server = os.path.join(server_folder, test_folder)
-    if not os.path.exists(test_folder_server):
+    if not is_folder(test_folder_server):
         return False
 
     return validate_test_folder(test_folder_server)
-    
\ No newline at end of file
+
+def get_test_size(client_folder: str, server_folder: str, test_folder: str) -> int:
+    '''
+    Returns the combined size of the client and server test result files of the given test. The size
+    is used to schedule the largest tests first. Missing files are counted as 0 bytes.
+
+            Parameters:
+                    client_folder (str): Path the base folder containing the client data
+                    server_folder (str): Path the base folder containing the server data
+                    test_folder (str): Name of the test scenario folder
+
+            Returns:
+                    size (int): Size of the test result files in bytes
+    '''
+    size = 0
+    for base_folder in (client_folder, server_folder):
+        info = get_file_info(os.path.join(base_folder, test_folder, test_results_file))
+        if info is not None:
+            size += info['size']
+
+    return size
+
+def strip_suffix(name: str) -> str:
+    '''
+    Returns the name of an entry without the suffix of an archive or compressed file (e.g.
+    04_1_Base_A.7z -> 04_1_Base_A, test_results.xml.gz -> test_results.xml).
+    '''
+    for suffix in archive_suffixes + compression_suffixes:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+
+    return name
+
+def is_folder(path: str) -> bool:
+    '''
+    Checks if the given (virtual) path is a folder, an archive or a folder within an archive.
+    '''
+    location, member = __resolve(path)
+    if location is None:
+        return False
+    if member is None:
+        return os.path.isdir(location)
+
+    return member in __load_archive(location)['folders']
+
+def is_file(path: str) -> bool:
+    '''
+    Checks if the given (virtual) path is a file, either on disk or within an archive and either
+    uncompressed or compressed (see compression_suffixes).
+    '''
+    return __locate_file(path) is not None
+
+def list_folder(path: str) -> list:
+    '''
+    Returns the names of the entries of the given (virtual) folder, like os.listdir. Archives and
+    compressed files are listed without their suffix (see strip_suffix).
+
+            Parameters:
+                    path (str): Path to the folder, the archive or a folder within an archive
+
+            Returns:
+                    names (list): Names of the entries
+    '''
+    location, member = __resolve(path)
+    if location is None:
+        raise FileNotFoundError(f'No such folder: {path}')
+
+    if member is None:
+        names = os.listdir(location)
+    else:
+        archive = __load_archive(location)
+        if member not in archive['folders']:
+            raise FileNotFoundError(f'No such folder: {path}')
+        names = archive['folders'][member]
+
+    return list(dict.fromkeys(strip_suffix(name) for name in names))
+
+def get_compressed_archive(path: str) -> str:
+    '''
+    Returns the compressed tar archive (e.g. 04_1_Base_A.tar.xz) containing the given (virtual)
+    path. A compressed tar archive has no index: every opened member is decompressed from the start
+    of the archive, and every process decompresses the whole archive once to build its index (see
+    __load_archive), so the reading time grows quadratically with the size of the archive.
+
+            Parameters:
+                    path (str): Path to the folder or file
+
+            Returns:
+                    archive (str): Path to the archive on disk, None if the path is not within a
+                                   compressed tar archive
+    '''
+    location, member = __resolve(path)
+    if location is None or member is None or __archive_type(location) != 'tar' or location.endswith('.tar'):
+        return None
+
+    return location
+
+def get_file_info(path: str) -> dict:
+    '''
+    Returns the size and modification time of the given (virtual) file. Within an archive, the size
+    is the uncompressed size of the member and the modification time is the one of the archive. For
+    a compressed file, the size is the compressed size.
+
+            Parameters:
+                    path (str): Path to the file
+
+            Returns:
+                    info (dict): Dictionary containing the keys 'size' (bytes) and 'mtime'
+                                 (nanoseconds), None if the file does not exist
+    '''
+    located = __locate_file(path)
+    if located is None:
+        return None
+
+    location, member, _ = located
+    stat = os.stat(location)
+    if member is None:
+        return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    return {'size': __load_archive(location)['files'][member][0], 'mtime': stat.st_mtime_ns}
+
+@contextmanager
+def open_file(path: str):
+    '''
+    Opens the given (virtual) file for binary reading. Members of archives and compressed files are
+    decompressed while they are read (streaming), nothing is extracted to disk. Only members of 7z
+    archives are decompressed into memory at once (py7zr has no streaming interface).
+
+            Parameters:
+                    path (str): Path to the file
+
+            Yields:
+                    file (file object): The opened file
+    '''
+    located = __locate_file(path)
+    if located is None:
+        raise FileNotFoundError(f'No such file: {path}')
+
+    location, member, compression = located
+    with __open_member(location, member) as file:
+        if compression is None:
+            yield file
+        else:
+            with __decompress(file, compression) as decompressed:
+                yield decompressed
+
+def __resolve(path: str) -> tuple:
+    '''
+    Resolves a virtual path into the location on disk and the path of the member within an archive.
+    Each component of the path may be an archive on disk, whose suffix is omitted in the path (e.g.
+    raw/04_1_Base_A/client for the archive raw/04_1_Base_A.zip).
+
+            Parameters:
+                    path (str): The virtual path
+
+            Returns:
+                    location (str): Path to the folder, file or archive on disk (None if not found)
+                    member (str): Path of the member within the archive ('' for the root of the
+                                  archive), None if the path is not within an archive
+    '''
+    # Longest existing part of the path
+    location = os.path.normpath(path)
+    components = list()
+    while not os.path.exists(location):
+        location, name = os.path.split(location)
+        if not name:
+            return None, None
+        components.insert(0, name)
+
+    # Remaining components, where archives are found with their suffix
+    while components and os.path.isdir(location):
+        name = components.pop(0)
+        for candidate in (name,) + tuple(name + suffix for suffix in archive_suffixes):
+            if os.path.exists(os.path.join(location, candidate)):
+                location = os.path.join(location, candidate)
+                break
+        else:
+            return None, None
+
+    if __archive_type(location) is None or not os.path.isfile(location):
+        return (location, None) if not components else (None, None)
+
+    return location, '/'.join(components)
+
+def __locate_file(path: str) -> tuple:
+    '''
+    Locates the given (virtual) file or its compressed version (see compression_suffixes).
+
+            Returns:
+                    location (str): Path to the file or archive on disk
+                    member (str): Path of the member within the archive (None on disk)
+                    compression (str): Suffix of the compression (None if not compressed)
+                    None if the file does not exist
+    '''
+    for compression in (None,) + compression_suffixes:
+        location, member = __resolve(path if compression is None else path + compression)
+        if location is None:
+            continue
+
+        if member is None:
+            if os.path.isfile(location) and (compression is not None or __archive_type(location) is None):
+                return location, None, compression
+        elif member in __load_archive(location)['files']:
+            return location, member, compression
+
+    return None
+
+def __archive_type(path: str) -> str:
+    '''
+    Returns the type of the archive ('zip', 'tar' or '7z') from the suffix of the path (None if the
+    path is not an archive).
+    '''
+    if path.endswith('.zip'):
+        return 'zip'
+    if path.endswith('.7z'):
+        return '7z'
+    if any(path.endswith(suffix) for suffix in archive_suffixes):
+        return 'tar'
+
+    return None
+
+def __load_archive(path: str) -> dict:
+    '''
+    Loads the index of the given archive: the files (with their uncompressed size) and the entries
+    of each folder. The index is loaded once per process (and again if the archive changes), so the
+    worker processes read the members of an archive in parallel.
+
+    If the archive only contains a folder named like the archive (e.g. 04_1_Base_A.7z containing
+    04_1_Base_A/client/...), the content of this folder is the root of the archive.
+
+            Parameters:
+                    path (str): Path to the archive
+
+            Returns:
+                    archive (dict): Dictionary containing the following keys: 'type', 'mtime',
+                                    'files' (member -> (size, name or TarInfo in the archive)),
+                                    'folders' (member -> list of entries), 'handle' (opened ZipFile)
+    '''
+    mtime = os.stat(path).st_mtime_ns
+    key = (path, os.getpid())
+    if key in __archives and __archives[key]['mtime'] == mtime:
+        return __archives[key]
+
+    archive_type = __archive_type(path)
+    handle = None
+    members = list()
+    if archive_type == 'zip':
+        handle = zipfile.ZipFile(path)
+        members = [(info.filename, info.file_size, info.filename) for info in handle.infolist() if not info.is_dir()]
+    elif archive_type == 'tar':
+        with tarfile.open(path) as tar:
+            members = [(info.name, info.size, info) for info in tar if info.isfile()]
+    elif py7zr is None:
+        raise ModuleNotFoundError(f'Reading 7z archives ({path}) requires the py7zr package')
+    else:
+        with py7zr.SevenZipFile(path) as sevenzip:
+            members = [(info.filename, info.uncompressed, info.filename) for info in sevenzip.list() if not info.is_directory]
+
+    # Members relative to the root of the archive
+    names = [name.replace('\\', '/').strip('/') for name, _, _ in members]
+    names = [name[2:] if name.startswith('./') else name for name in names]
+    stem = strip_suffix(os.path.basename(path))
+    if names and all(name.startswith(stem + '/') for name in names):
+        names = [name[len(stem) + 1:] for name in names]
+
+    files = dict()
+    folders = {'': dict()}
+    for name, (_, size, reference) in zip(names, members):
+        files[name] = (size, reference)
+
+        # Add the file and its parent folders to the entries of their folders
+        parts = name.split('/')
+        for depth in range(len(parts)):
+            folder = '/'.join(parts[:depth])
+            folders.setdefault(folder, dict())[parts[depth]] = None
+
+    archive = {
+        'type': archive_type,
+        'mtime': mtime,
+        'files': files,
+        'folders': {folder: list(entries) for folder, entries in folders.items()},
+        'handle': handle
+    }
+    __archives[key] = archive
+    return archive
+
+@contextmanager
+def __open_member(location: str, member: str):
+    '''
+    Opens a file on disk (member None) or a member of an archive for binary reading.
+    '''
+    if member is None:
+        with open(location, 'rb') as file:
+            yield file
+        return
+
+    archive = __load_archive(location)
+    size, reference = archive['files'][member]
+    if archive['type'] == 'zip':
+        with archive['handle'].open(reference) as file:
+            yield file
+    elif archive['type'] == 'tar':
+        # Separate TarFile per opened member, so members can be read concurrently (the TarInfo of the
+        # index is reused, the archive is not scanned again). A compressed archive is decompressed
+        # from the start up to the member (see get_compressed_archive).
+        with tarfile.open(location) as tar, tar.extractfile(reference) as file:
+            yield file
+    else:
+        with py7zr.SevenZipFile(location) as sevenzip:
+            if hasattr(sevenzip, 'read'):
+                file = sevenzip.read(targets=[reference])[reference]    # py7zr < 1.0
+            else:
+                factory = py7zr.io.BytesIOFactory(size + 1)
+                sevenzip.extract(targets=[reference], factory=factory)
+                file = factory.get(reference)
+        file.seek(0)
+        yield file
+
+def __decompress(file, compression: str):
+    '''
+    Returns a file object that decompresses the given file while it is read.
+    '''
+    if compression == '.gz':
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    if compression == '.xz':
+        return lzma.LZMAFile(file, mode='rb')
+    if compression == '.bz2':
+        return bz2.BZ2File(file, mode='rb')
+    if zstandard is None:
+        raise ModuleNotFoundError('Reading zst files requires the zstandard package')
+
+    return zstandard.ZstdDecompressor().stream_reader(file)
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from constants import profile_file
+from json_lines import load_json_lines, append_json_line
+
+try:
+    import resource
+except ImportError:
+    resource = None     # not available on Windows (no peak memory)
+
+def create_profile(job: dict) -> dict:
+    '''
+    Creates the profile of a test, which collects the duration, number of records and peak memory
+    of each processing stage (see measure_stage).
+
+            Parameters:
+                    job (dict): The test (see eParser.__collect_scenario)
+
+            Returns:
+                    profile (dict): Dictionary containing the following keys: 'campaign', 'scenario',
+                                    'test', 'pid', 'seconds' (total, see finish_profile), 'stages'
+                                    (list of dictionaries with the keys 'stage', 'seconds',
+                                    'peak_memory' and optional 'records')
+    '''
+    return {
+        'campaign': job['campaign'],
+        'scenario': job['scenario'],
+        'test': job['test_folder'],
+        'pid': os.getpid(),
+        'seconds': None,
+        'stages': list(),
+        '_start': time.perf_counter()
+    }
+
+@contextmanager
+def measure_stage(profile: dict, name: str):
+    '''
+    Measures the duration and peak memory (RSS) of the enclosed stage and adds it to the profile. The
+    yielded dictionary can be used to add values to the stage (e.g. stage['records'] = 1000). Without
+    a profile (instrumentation disabled) nothing is measured.
+
+            Parameters:
+                    profile (dict): Profile of the test (see create_profile) or None
+                    name (str): Name of the stage
+    '''
+    stage = {'stage': name}
+    if profile is None:
+        yield stage
+        return
+
+    __reset_peak_memory()
+    start = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        stage['seconds'] = time.perf_counter() - start
+        stage['peak_memory'] = get_peak_memory()
+        profile['stages'].append(stage)
+
+def finish_profile(profile: dict) -> dict:
+    '''
+    Sets the total duration of the profile and returns it (None without a profile).
+    '''
+    if profile is None:
+        return None
+
+    profile['seconds'] = time.perf_counter() - profile.pop('_start')
+    return profile
+
+def get_peak_memory() -> int:
+    '''
+    Returns the peak RSS of the current process in bytes (since the last reset on Linux, since the
+    start of the process on other systems, None if not available).
+    '''
+    try:
+        with open('/proc/self/status', 'r') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+
+    # ru_maxrss is given in bytes on macOS and in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+def append_profile(folder: str, profile: dict) -> None:
+    '''
+    Appends the profile of a test to the profile log (JSON lines) of the given output folder.
+
+            Parameters:
+                    folder (str): Path to the output folder of the execution
+                    profile (dict): Profile of the test (see finish_profile)
+    '''
+    append_json_line(os.path.join(folder, profile_file), profile)
+
+def load_profiles(folder: str) -> list:
+    '''
+    Loads all profiles of the profile log of the given output folder.
+    '''
+    return load_json_lines(os.path.join(folder, profile_file))
+
+def summarize_profiles(profiles: list) -> dict:
+    '''
+    Summarizes the profiles per campaign: number of tests, total duration, duration and records per
+    stage, duration per scenario and the maximum peak memory.
+
+            Parameters:
+                    profiles (list): List of profiles (see finish_profile)
+
+            Returns:
+                    summary (dict): Dictionary containing a dictionary for each campaign with the
+                                    following keys: 'tests', 'seconds', 'peak_memory', 'stages'
+                                    (stage -> {'seconds', 'records'}), 'scenarios' (scenario -> seconds)
+    '''
+    summary = dict()
+    for profile in profiles:
+        campaign = summary.setdefault(profile['campaign'], {'tests': 0, 'seconds': 0.0, 'peak_memory': None, 'stages': dict(), 'scenarios': dict()})
+        campaign['tests'] += 1
+        campaign['seconds'] += profile['seconds']
+        campaign['scenarios'][profile['scenario']] = campaign['scenarios'].get(profile['scenario'], 0.0) + profile['seconds']
+
+        for stage in profile['stages']:
+            totals = campaign['stages'].setdefault(stage['stage'], {'seconds': 0.0, 'records': 0})
+            totals['seconds'] += stage['seconds']
+            totals['records'] += stage.get('records', 0)
+            if stage['peak_memory'] is not None:
+                campaign['peak_memory'] = max(campaign['peak_memory'] or 0, stage['peak_memory'])
+
+    return summary
+
+def print_profile_summary(summary: dict, scenarios: int = 5) -> None:
+    '''
+    Prints the summary of the profiles (see summarize_profiles): the duration per stage and the
+    slowest scenarios of each campaign.
+
+            Parameters:
+                    summary (dict): Summary of the profiles
+                    scenarios (int): Number of the slowest scenarios printed per campaign
+    '''
+    for name, campaign in summary.items():
+        peak_memory = f'{campaign["peak_memory"] / 1048576:.0f} MiB' if campaign['peak_memory'] is not None else '-'
+        print(f'Profile of campaign {name}: {campaign["tests"]} tests, {campaign["seconds"]:.1f} s, peak memory {peak_memory}')
+
+        for stage, totals in sorted(campaign['stages'].items(), key=lambda item: item[1]['seconds'], reverse=True):
+            rate = f', {totals["records"] / totals["seconds"]:.0f} records/s' if totals['records'] and totals['seconds'] > 0 else ''
+            print(f'    {stage:<24} {totals["seconds"]:>9.2f} s{rate}')
+
+        for scenario, seconds in sorted(campaign['scenarios'].items(), key=lambda item: item[1], reverse=True)[:scenarios]:
+            print(f'    scenario {scenario:<15} {seconds:>9.2f} s')
+
+def __reset_peak_memory() -> None:
+    '''
+    Resets the peak RSS of the current process (Linux only), so the peak of each stage is measured.
+    '''
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
@@ -0,0 +1,107 @@
+import os
+import traceback
+from datetime import datetime
+from constants import journal_file, failures_file
+from manifest import get_test_key
+from json_lines import load_json_lines, append_json_line
+
+def start_journal(folder: str) -> set:
+    '''
+    Starts a new execution in the checkpoint journal of the given output folder and returns the tests
+    that were interrupted in the previous execution (started, but never completed, e.g. because the
+    execution was killed or a worker process ran out of memory).
+
+    The journal is a JSON lines file: an entry is appended when an execution starts, when a worker
+    process starts a test and when the main process completes it. Completed tests are also contained
+    in the manifest, so an interrupted execution is resumed with --incremental on the same folder.
+
+            Parameters:
+                    folder (str): Path to the output folder of the execution
+
+            Returns:
+                    interrupted (set): Keys of the interrupted tests (see manifest.get_test_key)
+    '''
+    interrupted = load_interrupted(folder)
+    __append(folder, {'event': 'execution', 'pid': os.getpid()})
+    return interrupted
+
+def append_journal(folder: str, job: dict, event: str) -> None:
+    '''
+    Appends an event of a test to the checkpoint journal of the given output folder.
+
+            Parameters:
+                    folder (str): Path to the output folder of the execution
+                    job (dict): The test (see eParser.__collect_scenario)
+                    event (str): 'started' or the status of the completed test ('processed',
+                                 'skipped', 'invalid' or 'failed')
+    '''
+    __append(folder, {'event': event, 'key': get_test_key(job), 'pid': os.getpid()})
+
+def load_interrupted(folder: str) -> set:
+    '''
+    Returns the keys of the tests that were started but not completed in the latest execution of the
+    checkpoint journal of the given output folder.
+    '''
+    interrupted = set()
+    for entry in load_json_lines(os.path.join(folder, journal_file)):
+        if entry['event'] == 'execution':
+            interrupted = set()
+        elif entry['event'] == 'started':
+            interrupted.add(entry['key'])
+        else:
+            interrupted.discard(entry['key'])
+
+    return interrupted
+
+def capture_error(job: dict, error: BaseException) -> dict:
+    '''
+    Captures an error that occurred while processing a test.
+
+            Parameters:
+                    job (dict): The test (see eParser.__collect_scenario)
+                    error (BaseException): The error
+
+            Returns:
+                    failure (dict): Dictionary containing the following keys: 'key', 'campaign',
+                                    'scenario', 'test', 'type' (name of the exception class),
+                                    'message', 'traceback', 'time'
+    '''
+    return {
+        'key': get_test_key(job),
+        'campaign': job['campaign'],
+        'scenario': job['scenario'],
+        'test': job['test_folder'],
+        'type': type(error).__name__,
+        'message': str(error),
+        'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__)),
+        'time': datetime.now().isoformat(timespec='seconds')
+    }
+
+def append_failure(folder: str, failure: dict) -> None:
+    '''
+    Appends a failed test to the failures report (JSON lines) of the given output folder.
+
+            Parameters:
+                    folder (str): Path to the output folder of the execution
+                    failure (dict): The captured error (see capture_error)
+    '''
+    append_json_line(os.path.join(folder, failures_file), failure)
+
+def print_failures(failures: list, folder: str) -> None:
+    '''
+    Prints a short summary of the failed tests of an execution (the details are contained in the
+    failures report).
+    '''
+    if not failures:
+        return
+
+    print(f'{len(failures)} tests failed (details in {os.path.join(folder, failures_file)}):')
+    for failure in failures:
+        print(f'    {failure["key"]}: {failure["type"]}: {failure["message"]}')
+
+def __append(folder: str, entry: dict) -> None:
+    '''
+    Appends an entry (with the current time) to the checkpoint journal.
+    '''
+    entry['time'] = datetime.now().isoformat(timespec='seconds')
+    append_json_line(os.path.join(folder, journal_file), entry)
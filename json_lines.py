@@ -0,0 +1,40 @@
+import os
+import json
+
+def load_json_lines(path: str) -> list:
+    '''
+    Loads all entries of the given JSON lines file (manifest, journal, failures report and profile
+    log of an execution). Incomplete lines (e.g. the execution was interrupted while writing) are
+    skipped.
+
+            Parameters:
+                    path (str): Path to the JSON lines file
+
+            Returns:
+                    entries (list): The entries in the order of the file (empty if the file does
+                                    not exist)
+    '''
+    entries = list()
+    if not os.path.isfile(path):
+        return entries
+
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return entries
+
+def append_json_line(path: str, entry: dict) -> None:
+    '''
+    Appends an entry to the given JSON lines file. Each entry is written with a single write call, so
+    the entries of concurrent processes are not interleaved.
+
+            Parameters:
+                    path (str): Path to the JSON lines file
+                    entry (dict): The entry (JSON serializable)
+    '''
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(entry) + '\n')
@@ -0,0 +1,148 @@
+import os
+import hashlib
+from constants import test_description_file, test_results_file, manifest_file
+from file_management import get_file_info, open_file
+from json_lines import load_json_lines, append_json_line
+
+# Options that do not change the output of a test (ignored when comparing manifest entries)
+runtime_options = ('version', 'workers', 'incremental', 'hash', 'execution_folder', 'database', 'profile', 'progress', 'fast_scan', 'parallel_sides')
+
+def load_manifest(folder: str) -> dict:
+    '''
+    Loads the manifest of the given output folder. The manifest is a JSON lines file with one entry
+    per processed test, later entries replace earlier entries of the same test.
+
+            Parameters:
+                    folder (str): Path to the output folder of the execution
+
+            Returns:
+                    manifest (dict): Dictionary containing the latest entry for each test key
+    '''
+    return {entry['key']: entry for entry in load_json_lines(os.path.join(folder, manifest_file))}
+
+def append_manifest(folder: str, entry: dict) -> None:
+    '''
+    Appends the given entry to the manifest of the given output folder.
+
+            Parameters:
+                    folder (str): Path to the output folder of the execution
+                    entry (dict): Manifest entry of a test (see create_manifest_entry)
+    '''
+    append_json_line(os.path.join(folder, manifest_file), entry)
+
+def get_test_key(job: dict) -> str:
+    '''
+    Returns the key of the given test in the manifest ('campaign/scenario/test').
+    '''
+    return f'{job["campaign"]}/{job["scenario"]}/{job["test_folder"]}'
+
+def get_test_inputs(job: dict, hash_files: bool = False, previous: dict = None) -> dict:
+    '''
+    Returns the size, modification time and (optional) SHA-256 hash of the input files of the given
+    test. The hash of a file is only calculated if its size or modification time changed compared to
+    the previous manifest entry, so unchanged files are never read.
+
+            Parameters:
+                    job (dict): The test (see eParser.__collect_scenario)
+                    hash_files (bool): Calculate the hash of the input files
+                    previous (dict): Inputs of the previous manifest entry of the test (or None)
+
+            Returns:
+                    inputs (dict): Dictionary containing the size ('size'), modification time
+                                   ('mtime') and hash ('sha256') for each input file
+    '''
+    files = {
+        'client/' + test_description_file: os.path.join(job['client_path'], job['test_folder'], test_description_file),
+        'client/' + test_results_file: os.path.join(job['client_path'], job['test_folder'], test_results_file),
+        'server/' + test_results_file: os.path.join(job['server_path'], job['test_folder'], test_results_file)
+    }
+
+    inputs = dict()
+    for name, path in files.items():
+        info = get_file_info(path)
+        if info is None:
+            continue
+
+        inputs[name] = info
+
+        if hash_files:
+            previous_input = (previous or dict()).get(name, dict())
+            if previous_input.get('sha256') and previous_input.get('size') == info['size'] and previous_input.get('mtime') == info['mtime']:
+                inputs[name]['sha256'] = previous_input['sha256']
+            else:
+                inputs[name]['sha256'] = hash_file(path)
+
+    return inputs
+
+def hash_file(path: str) -> str:
+    '''
+    Returns the SHA-256 hash of the given file (of the decompressed content for a compressed file or
+    a member of an archive, see file_management.open_file).
+    '''
+    digest = hashlib.sha256()
+    with open_file(path) as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def create_manifest_entry(job: dict, options: dict, inputs: dict, output: str, summary: dict = None) -> dict:
+    '''
+    Creates the manifest entry for a processed test.
+
+            Parameters:
+                    job (dict): The test (see eParser.__collect_scenario)
+                    options (dict): Options of the execution (see eParser.main)
+                    inputs (dict): Input files of the test (see get_test_inputs)
+                    output (str): Path to the output folder of the test (relative to the execution)
+                    summary (dict): Summary of the test (see performance_evaluation.evaluate_performance)
+
+            Returns:
+                    entry (dict): Manifest entry of the test
+    '''
+    return {
+        'key': get_test_key(job),
+        'version': options['version'],
+        'options': __output_options(options),
+        'inputs': inputs,
+        'output': output,
+        'summary': summary
+    }
+
+def is_up_to_date(entry: dict, options: dict, inputs: dict, folder: str) -> bool:
+    '''
+    Checks if the output of a test is up to date, i.e. it was created by the same eParser version
+    with the same options from the same input files and the performance.xml still exists.
+
+            Parameters:
+                    entry (dict): Previous manifest entry of the test (or None)
+                    options (dict): Options of the execution (see eParser.main)
+                    inputs (dict): Current input files of the test (see get_test_inputs)
+                    folder (str): Path to the output folder of the execution
+
+            Returns:
+                    result (bool): True if the test does not have to be processed again
+    '''
+    if entry is None or entry['version'] != options['version'] or entry['options'] != __output_options(options):
+        return False
+
+    if entry['inputs'].keys() != inputs.keys():
+        return False
+
+    for name, current in inputs.items():
+        previous = entry['inputs'][name]
+        if previous['size'] != current['size']:
+            return False
+
+        # Files with a new modification time are only unchanged if the hash is the same
+        if previous['mtime'] != current['mtime']:
+            if not (previous.get('sha256') and previous.get('sha256') == current.get('sha256')):
+                return False
+
+    return os.path.isfile(os.path.join(folder, entry['output'], 'performance.xml'))
+
+def __output_options(options: dict) -> dict:
+    '''
+    Returns the options that influence the output of a test.
+    '''
+    return {key: value for key, value in options.items() if key not in runtime_options}
@@ -1,122 +1,342 @@
 import xml.etree.ElementTree as ET
 import os
+import re
+import mmap
+from array import array
+import numpy as np
 from constants import test_description_file, test_results_file
+from file_management import open_file
 
-def parse_result_file(path: str) -> dict:
+# Columnar representation of the timestamp messages (24 bytes per record)
+timestamp_dtype = np.dtype([('sequence', np.int64), ('tv_sec', np.int64), ('tv_nsec', np.int64)])
+
+# Fast scanner of the timestamp records (see scan_test_results): characters of the values (removed to
+# get the tags of the records), translation of everything except the values into spaces and pattern
+# of the elements containing a value
+scanner_value_bytes = b'0123456789-'
+scanner_ignored_bytes = scanner_value_bytes + b' \t\r\n'
+scanner_number_translation = bytes(byte if byte in scanner_value_bytes else ord(' ') for byte in range(256))
+scanner_value_pattern = re.compile(rb'<(\w+)>\s*-?\d+\s*</\1>')
+
+def parse_test_results(path: str, timestamps: bool = True, columnar: bool = False, recover: bool = False, fast: bool = False) -> tuple:
     '''
-    Parses the test results file and returns the data as a dictionary. The dictionary contains the
-    following keys: 'status', 'report', 'ethtool_statistic', 'ip_statistic', 'netstat_statistic'.
-    The values of the keys are dictionaries themselves. The 'report' dictionary contains the
-    following keys: 'total', 'losses', 'timer_misses', 'duration'. The duration is -1 if no value is
-    present in the test results file.
+    Parses the test results file in a single streaming pass and returns the test results together
+    with the timestamp messages. The file is read with iterparse and every element is released as
+    soon as it has been processed, so the memory usage does not grow with the number of timestamp
+    records in the file. The path may lead into an archive and the file may be compressed (see
+    file_management.open_file), the content is then decompressed while it is parsed.
 
             Parameters:
                     path (str): Path to the test results file
+                    timestamps (bool): If False, the timestamp records are skipped (not collected)
+                    columnar (bool): If True, the timestamp records are returned as a structured
+                                     NumPy array (see timestamp_dtype) instead of a list
+                    recover (bool): If True, a truncated or malformed file is parsed up to the error
+                                    instead of raising ET.ParseError. The results then contain the
+                                    key 'partial' (error message) and the records parsed so far.
+                                    The error is still raised if no report (or, with timestamps,
+                                    no timestamp record) could be recovered.
+                    fast (bool): If True (and columnar), the timestamp records are read with the fast
+                                 scanner (see scan_test_results) if the file has the expected layout
 
             Returns:
-                    results (dict): Dictionary containing the test results
+                    results (dict): Dictionary containing the test results (see parse_result_file)
+                    records (list|np.ndarray): The timestamp messages (see parse_timestamp_messages),
+                                               None if there is no timestamp section
     '''
+    if fast and timestamps and columnar:
+        scanned = scan_test_results(path)
+        if scanned is not None:
+            return scanned
+
     xml_file = os.path.join(path, test_results_file)
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
 
     results = dict()
+    records = None
+
+    # Stack of the currently open elements (root at index 0)
+    elements = list()
+
+    try:
+        with open_file(xml_file) as file:
+            for event, element in ET.iterparse(file, events=('start', 'end')):
+                if event == 'start':
+                    elements.append(element)
+
+                    # <custom><timestamp> opens the section with the timestamp records
+                    if len(elements) == 3 and element.tag == 'timestamp' and elements[1].tag == 'custom':
+                        records = (array('q'), array('q'), array('q')) if columnar else list()
+                    continue
+
+                elements.pop()
+                depth = len(elements)
+
+                # TIMESTAMP RECORDS <custom><timestamp><record>
+                if depth == 3 and element.tag == 'record' and elements[2].tag == 'timestamp' and elements[1].tag == 'custom':
+                    if timestamps and columnar:
+                        records[0].append(int(element.find('sequence').text))
+                        records[1].append(int(element.find('.//tv_sec').text))
+                        records[2].append(int(element.find('.//tv_nsec').text))
+                    elif timestamps:
+                        records.append({
+                            'sequence': element.find('sequence').text,
+                            'tv_sec': element.find('.//tv_sec').text,
+                            'tv_nsec': element.find('.//tv_nsec').text
+                        })
+
+                    # Release the record, the timestamp element keeps no children
+                    elements[2].remove(element)
+
+                # SECTIONS (direct children of the root)
+                elif depth == 1:
+                    __parse_result_section(element, results)
+                    elements[0].remove(element)
+
+    except (ET.ParseError, EOFError) as error:
+        if not recover:
+            raise
+
+        # Truncated (or malformed) file: everything parsed before the error is kept. The complete
+        # children of the open section are parsed as well (e.g. the report of <custom> if the file
+        # ends within the timestamp records). A truncated compressed file raises EOFError.
+        results['partial'] = str(error)
+        if len(elements) > 1:
+            try:
+                __parse_result_section(elements[1], results)
+            except (AttributeError, ValueError):
+                pass    # the section is incomplete
+
+        # Nothing usable was recovered (e.g. the file is not a test results file at all)
+        if 'report' not in results or (timestamps and (records is None or len(records[0] if columnar else records) == 0)):
+            raise
+
+    if columnar and records is not None:
+        records = timestamp_array(*records)
+
+    return results, records
+
+def scan_test_results(path: str, chunk_size: int = 1 << 22) -> tuple:
+    '''
+    Fast path of parse_test_results (columnar) for the fixed record layout of the TestSuite. Instead
+    of creating elements for every record, the raw bytes of the <custom><timestamp> block are scanned
+    in chunks (of complete records) of the memory-mapped file:
+
+        - The layout is learned from the first record: the tags without values and whitespace (e.g.
+          '<record><sequence></sequence><timestamp><tv_sec></tv_sec>...') and the order of the
+          elements containing a value.
+        - Every chunk has to consist of exactly this layout (checked by removing values and
+          whitespace and comparing with the repeated layout).
+        - The values are converted at once by translating everything else into spaces and parsing
+          the result with np.fromstring.
+
+    The remaining sections (without the records) are parsed with ElementTree. If the file does not
+    have the expected layout (e.g. other elements, attributes, comments or values, or a truncated
+    file), None is returned and the file has to be parsed with the XML parser.
 
+            Parameters:
+                    path (str): Path to the test results file
+                    chunk_size (int): Approximate number of bytes scanned at once
 
-    # STATUS
-    status = root.find('status').text
-    results['status'] = 'SUCCESS' if status == 'STATUS_SUCCESS' else 'ERROR'
+            Returns:
+                    results (dict): Dictionary containing the test results (see parse_result_file)
+                    records (np.ndarray): Structured array containing the timestamp messages (see
+                                          timestamp_dtype)
+                    None if the file cannot be scanned
+    '''
+    xml_file = os.path.join(path, test_results_file)
+    if not os.path.isfile(xml_file) or os.path.getsize(xml_file) == 0:
+        return None     # compressed or archived file (see file_management.open_file) or empty file
+
+    with open(xml_file, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # Locate the content of the <custom><timestamp> block
+        custom_start = data.find(b'<custom>')
+        block_start = data.find(b'<timestamp>', custom_start) if custom_start >= 0 else -1
+        custom_end = data.find(b'</custom>', block_start) if block_start >= 0 else -1
+        block_end = data.rfind(b'</timestamp>', block_start, custom_end) if custom_end >= 0 else -1
+        if block_end < 0:
+            return None
+        content_start = block_start + len(b'<timestamp>')
+
+        # Layout of the records (learned from the first record)
+        columns = list()
+        first_start = data.find(b'<record>', content_start, block_end)
+        if first_start >= 0:
+            first_end = data.find(b'</record>', first_start, block_end)
+            if first_end < 0:
+                return None
+
+            first_record = data[first_start:first_end + len(b'</record>')]
+            names = [name.decode() for name in scanner_value_pattern.findall(first_record)]
+            if not all(names.count(name) == 1 for name in ('sequence', 'tv_sec', 'tv_nsec')):
+                return None
+
+            layout = first_record.translate(None, scanner_ignored_bytes)
+            fields = len(names)
+            field_index = [names.index(name) for name in ('sequence', 'tv_sec', 'tv_nsec')]
+
+        # Scan the records in chunks (each chunk ends after a complete record)
+        position = content_start
+        while position < block_end:
+            end = min(position + chunk_size, block_end)
+            if end < block_end:
+                end = data.rfind(b'</record>', position, end)
+                if end < 0:
+                    end = data.find(b'</record>', position, block_end)
+                end = end + len(b'</record>') if end >= 0 else block_end
+
+            chunk = data[position:end]
+            position = end
+
+            count = chunk.count(b'<record>')
+            if count == 0:
+                if chunk.translate(None, scanner_ignored_bytes):
+                    return None
+                continue
+
+            if chunk.translate(None, scanner_ignored_bytes) != layout * count:
+                return None
+
+            try:
+                values = np.fromstring(chunk.translate(scanner_number_translation), dtype=np.int64, sep=' ')
+            except ValueError:
+                return None
+            if len(values) != count * fields:
+                return None
+
+            values = values.reshape(count, fields)
+            columns.append(values[:, field_index])
+
+        # Remaining sections (the document without the records), a file truncated after the records
+        # is left to the XML parser (see parse_test_results with recover)
+        try:
+            root = ET.fromstring(data[:content_start] + data[block_end:])
+        except ET.ParseError:
+            return None
 
+    results = dict()
+    for section in root:
+        __parse_result_section(section, results)
 
-    # CONCULSION
-    report = dict()
-    custom_root = root.find('custom')
-    report['total'] = int(custom_root.find('num_total').text)
-    report['timer_misses'] = int(custom_root.find('num_misses').text)
-
-    duration = custom_root.find('elapsed_time')
-    if duration is not None:
-        report['duration'] = float(duration.text)
-    else:
-        report['duration'] = -1   # no value present
+    values = np.concatenate(columns) if columns else np.empty((0, 3), dtype=np.int64)
+    return results, timestamp_array(values[:, 0], values[:, 1], values[:, 2])
 
-    results['report'] = report
+def timestamp_array(sequence, tv_sec, tv_nsec) -> np.ndarray:
+    '''
+    Creates the columnar representation of the timestamp messages (structured NumPy array with the
+    fields 'sequence', 'tv_sec' and 'tv_nsec', see timestamp_dtype) from the given columns.
 
+            Parameters:
+                    sequence (array): Sequence numbers
+                    tv_sec (array): Seconds of the timestamps
+                    tv_nsec (array): Nanoseconds of the timestamps
 
-    # STATISTICS <ethtool_statistic>
-    ethtool_statistic = dict()
-    ethtool_statistic_root = root.find('ethtool_statistic')
-    if ethtool_statistic_root is not None:
-        for child in ethtool_statistic_root:
-            start = int(child.find('start').text)
-            end = int(child.find('end').text)
-            ethtool_statistic[child.tag] = end - start
+            Returns:
+                    records (np.ndarray): Structured array containing the timestamp messages
+    '''
+    records = np.empty(len(sequence), dtype=timestamp_dtype)
+    records['sequence'] = sequence
+    records['tv_sec'] = tv_sec
+    records['tv_nsec'] = tv_nsec
+    return records
 
-        results['ethtool_statistic'] = ethtool_statistic
+def timestamp_records_to_array(records: list) -> np.ndarray:
+    '''
+    Converts timestamp messages in the list representation (see parse_timestamp_messages) into the
+    columnar representation. The integer conversion happens exactly once per value.
 
+            Parameters:
+                    records (list): List of dictionaries containing the timestamp messages
 
-    # STATISTICS <ip_statistic>
-    ip_statistic = dict()
-    ip_statistic_root = root.find('ip_statistic')
-    if ip_statistic_root is not None:
-        for child in root.find('ip_statistic'):
-            start = int(child.find('start').text)
-            end = int(child.find('end').text)
+            Returns:
+                    records (np.ndarray): Structured array containing the timestamp messages
+    '''
+    if isinstance(records, np.ndarray):
+        return records
 
-            if 'mtu' == child.tag:
-                ip_statistic[child.tag] = end
-            else:
-                ip_statistic[child.tag] = end - start
+    return timestamp_array(
+        array('q', [int(record['sequence']) for record in records]),
+        array('q', [int(record['tv_sec']) for record in records]),
+        array('q', [int(record['tv_nsec']) for record in records])
+    )
+
+def __parse_result_section(element: ET.Element, results: dict) -> None:
+    '''
+    Parses a single section (direct child of the root element) of the test results file and stores
+    the data in the results dictionary.
+
+            Parameters:
+                    element (ET.Element): The section element
+                    results (dict): Dictionary containing the test results
+    '''
+    # STATUS
+    if element.tag == 'status':
+        results['status'] = 'SUCCESS' if element.text == 'STATUS_SUCCESS' else 'ERROR'
 
-        results['ip_statistic'] = ip_statistic
+
+    # CONCULSION
+    elif element.tag == 'custom':
+        report = dict()
+        report['total'] = int(element.find('num_total').text)
+        report['timer_misses'] = int(element.find('num_misses').text)
+
+        duration = element.find('elapsed_time')
+        if duration is not None:
+            report['duration'] = float(duration.text)
+        else:
+            report['duration'] = -1   # no value present
+
+        results['report'] = report
 
 
-    # STATISTICS <netstat_statistic>
-    netstat_statistic = dict()
-    netstat_root = root.find('netstat_statistic')
-    if netstat_root is not None:
-        for child in netstat_root:
+    # STATISTICS <ethtool_statistic>, <ip_statistic>, <netstat_statistic>
+    elif element.tag in ('ethtool_statistic', 'ip_statistic', 'netstat_statistic'):
+        statistic = dict()
+        for child in element:
             start = int(child.find('start').text)
             end = int(child.find('end').text)
-            netstat_statistic[child.tag] = end - start
 
-        results['netstat_statistic'] = netstat_statistic
+            if element.tag == 'ip_statistic' and 'mtu' == child.tag:
+                statistic[child.tag] = end
+            else:
+                statistic[child.tag] = end - start
 
+        results[element.tag] = statistic
 
+def parse_result_file(path: str, recover: bool = False) -> dict:
+    '''
+    Parses the test results file and returns the data as a dictionary. The dictionary contains the
+    following keys: 'status', 'report', 'ethtool_statistic', 'ip_statistic', 'netstat_statistic'.
+    The values of the keys are dictionaries themselves. The 'report' dictionary contains the
+    following keys: 'total', 'losses', 'timer_misses', 'duration'. The duration is -1 if no value is
+    present in the test results file. A truncated file parsed with recover contains the key 'partial'.
+
+            Parameters:
+                    path (str): Path to the test results file
+                    recover (bool): Parse a truncated file up to the truncation (see parse_test_results)
+
+            Returns:
+                    results (dict): Dictionary containing the test results
+    '''
+    results, _ = parse_test_results(path, timestamps=False, recover=recover)
     return results
 
-def parse_timestamp_messages(path: str) -> list:
+def parse_timestamp_messages(path: str, columnar: bool = False, recover: bool = False) -> list:
     '''
     Parses the timestamp messages from the test results file and returns them as a list of dictionaries.
     Each dictionary contains the following keys: 'sequence', 'tv_sec', 'tv_nsec'. The list is sorted by
-    sequence.
+    sequence. If columnar is set, a structured NumPy array with int64 fields of the same names is
+    returned instead (see timestamp_dtype).
 
             Parameters:
                     path (str): Path to the test results file
+                    columnar (bool): Return the columnar representation
+                    recover (bool): Return the records up to the truncation of a truncated file
+                                    (see parse_test_results)
 
             Returns:
                     reports (list): List of dictionaries containing the query messages
     '''
-    xml_file = os.path.join(path, test_results_file)
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-    timestamp_root = root.find('custom').find('timestamp')
-    if timestamp_root is None:
-        return None
-
-    records = list()
-
-    for record in timestamp_root.findall('record'):
-        sequence = record.find('sequence').text
-        tv_sec = record.find('.//tv_sec').text
-        tv_nsec = record.find('.//tv_nsec').text
-
-        records.append({
-            'sequence': sequence,
-            'tv_sec': tv_sec,
-            'tv_nsec': tv_nsec
-        })
-
+    _, records = parse_test_results(path, columnar=columnar, recover=recover)
     return records
 
 
@@ -133,7 +353,8 @@ def parse_description_file(path) -> dict:
                     results (dict): Dictionary containing the test results
     '''
     xml_file = os.path.join(path, test_description_file)
-    tree = ET.parse(xml_file)
+    with open_file(xml_file) as file:
+        tree = ET.parse(file)
     root = tree.getroot()
 
     description = dict()
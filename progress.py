@@ -0,0 +1,127 @@
+import time
+from datetime import timedelta
+from constants import progress_interval
+
+def create_progress(jobs: list) -> dict:
+    '''
+    Creates the progress of an execution. The worker processes report events through a queue (see
+    report_event), the main process collects them (see collect_events) together with the finished
+    tests (see complete_test) and prints the progress periodically (see print_progress).
+
+            Parameters:
+                    jobs (list): List of tests of the execution (see eParser.__collect_scenario)
+
+            Returns:
+                    progress (dict): Dictionary containing the number of tests ('total', 'running',
+                                     'finished', 'failed', 'skipped'), the processed records, the
+                                     size of the result files ('size', 'processed_size') and the
+                                     start time of the execution
+    '''
+    now = time.monotonic()
+    return {
+        'total': len(jobs),
+        'running': 0,
+        'finished': 0,
+        'failed': 0,
+        'skipped': 0,
+        'records': 0,
+        'size': sum(job['size'] for job in jobs),
+        'processed_size': 0,
+        'start': now,
+        'printed': now
+    }
+
+def report_event(queue, event: str, records: int = 0) -> None:
+    '''
+    Reports an event of a test to the main process (called by the worker processes). Only a few
+    events are sent per test ('started' and 'records'), so the queue does not slow down processing.
+
+            Parameters:
+                    queue (Queue): Queue of the execution (None if the progress is disabled)
+                    event (str): 'started' or 'records'
+                    records (int): Number of processed records (for the 'records' event)
+    '''
+    if queue is not None:
+        queue.put((event, records))
+
+def collect_events(progress: dict, queue) -> None:
+    '''
+    Collects all events of the worker processes that are currently in the queue (non-blocking).
+    '''
+    if progress is None or queue is None:
+        return
+
+    while not queue.empty():
+        event, records = queue.get()
+        if event == 'started':
+            progress['running'] += 1
+        elif event == 'records':
+            progress['records'] += records
+
+def complete_test(progress: dict, job: dict, status: str) -> None:
+    '''
+    Updates the progress for a test that is completed.
+
+            Parameters:
+                    progress (dict): Progress of the execution (see create_progress) or None
+                    job (dict): The test (see eParser.__collect_scenario)
+                    status (str): 'processed', 'skipped', 'invalid' or 'failed'
+    '''
+    if progress is None:
+        return
+
+    progress['running'] = max(progress['running'] - 1, 0)
+    if status == 'processed':
+        progress['finished'] += 1
+        progress['processed_size'] += job['size']
+    elif status == 'failed':
+        progress['failed'] += 1
+        progress['processed_size'] += job['size']
+    else:
+        # Skipped tests do not count for the throughput (the ETA only considers processed data)
+        progress['skipped'] += 1
+        progress['size'] -= job['size']
+
+def reset_running(progress: dict) -> None:
+    '''
+    Resets the number of running tests (e.g. after the worker processes of a broken pool were terminated).
+    '''
+    if progress is not None:
+        progress['running'] = 0
+
+def format_progress(progress: dict) -> str:
+    '''
+    Returns the progress as text: number of completed tests, records per second and the estimated
+    remaining time (from the size of the remaining result files and the throughput so far).
+    '''
+    elapsed = time.monotonic() - progress['start']
+    completed = progress['finished'] + progress['failed'] + progress['skipped']
+
+    rate = progress['records'] / elapsed if elapsed > 0 else 0
+    remaining_size = progress['size'] - progress['processed_size']
+    if remaining_size <= 0:
+        eta = timedelta(0)
+    elif progress['processed_size'] > 0 and elapsed > 0:
+        eta = timedelta(seconds=round(remaining_size * elapsed / progress['processed_size']))
+    else:
+        eta = 'unknown'
+
+    return (f'Progress: {completed}/{progress["total"]} tests ({progress["finished"]} finished, {progress["failed"]} failed, '
+            f'{progress["skipped"]} skipped, {progress["running"]} running), {rate:.0f} records/s, '
+            f'elapsed {timedelta(seconds=round(elapsed))}, ETA {eta}')
+
+def print_progress(progress: dict, force: bool = False) -> None:
+    '''
+    Prints the progress if the progress interval has passed since the last output (or if forced).
+
+            Parameters:
+                    progress (dict): Progress of the execution (see create_progress) or None
+                    force (bool): Print the progress regardless of the interval
+    '''
+    if progress is None:
+        return
+
+    now = time.monotonic()
+    if force or now - progress['printed'] >= progress_interval:
+        progress['printed'] = now
+        print(format_progress(progress), flush=True)
@@ -0,0 +1,174 @@
+import math
+import json
+import numpy as np
+from constants import sketch_relative_accuracy
+
+# Values with a smaller magnitude are counted in the zero bucket
+sketch_minimum_value = 1e-12
+
+# Number of values added to a sketch at once (see add_to_sketch)
+sketch_chunk_size = 1 << 20
+
+def create_sketch(relative_accuracy: float = sketch_relative_accuracy) -> dict:
+    '''
+    Creates an empty quantile sketch (DDSketch). The sketch counts the values in logarithmic
+    buckets, so every quantile is returned with the given relative accuracy while the memory only
+    depends on the range of the values (a few thousand buckets for latencies between 1 µs and 1 s)
+    and not on the number of values. Sketches with the same accuracy can be merged, e.g. to get the
+    quantiles of a whole campaign from the sketches of its tests.
+
+            Parameters:
+                    relative_accuracy (float): Relative accuracy of the quantiles (e.g. 0.001 = 0.1%)
+
+            Returns:
+                    sketch (dict): Dictionary containing the following keys: 'relative_accuracy',
+                                   'count', 'zero', 'minimum', 'maximum', 'positive', 'negative'
+    '''
+    return {
+        'relative_accuracy': relative_accuracy,
+        'count': 0,
+        'zero': 0,
+        'minimum': math.inf,
+        'maximum': -math.inf,
+        'positive': dict(),     # bucket index -> count
+        'negative': dict()      # bucket index -> count (of the magnitude)
+    }
+
+def add_to_sketch(sketch: dict, values: np.ndarray, chunk_size: int = sketch_chunk_size) -> None:
+    '''
+    Adds the given values to the sketch (vectorized). The values are processed in chunks of a fixed
+    size and the buckets of a chunk are counted with np.bincount, so the temporary memory does not
+    grow with the number of values (the values may also be a memory-mapped array).
+
+            Parameters:
+                    sketch (dict): The sketch (see create_sketch)
+                    values (np.ndarray): Values to add
+                    chunk_size (int): Number of values processed at once
+    '''
+    log_gamma = __log_gamma(sketch)
+
+    for start in range(0, len(values), chunk_size):
+        chunk = np.asarray(values[start:start + chunk_size], dtype=np.float64)
+        sketch['count'] += len(chunk)
+        sketch['minimum'] = min(sketch['minimum'], float(chunk.min()))
+        sketch['maximum'] = max(sketch['maximum'], float(chunk.max()))
+
+        zero = len(chunk)
+        for store, magnitudes in (('positive', chunk[chunk > sketch_minimum_value]), ('negative', chunk[chunk < -sketch_minimum_value])):
+            zero -= len(magnitudes)
+            if len(magnitudes) == 0:
+                continue
+
+            # Bucket indices (computed in place on the filtered copy), counted relative to the lowest one
+            np.abs(magnitudes, out=magnitudes)
+            np.log(magnitudes, out=magnitudes)
+            magnitudes /= log_gamma
+            np.ceil(magnitudes, out=magnitudes)
+            indices = magnitudes.astype(np.int64)
+            offset = int(indices.min())
+            counts = np.bincount(indices - offset)
+
+            buckets = sketch[store]
+            occupied = np.flatnonzero(counts)
+            for index, count in zip((occupied + offset).tolist(), counts[occupied].tolist()):
+                buckets[index] = buckets.get(index, 0) + count
+
+        sketch['zero'] += zero
+
+def merge_sketches(sketches: list) -> dict:
+    '''
+    Merges the given sketches (with the same relative accuracy) into a new sketch.
+
+            Parameters:
+                    sketches (list): List of sketches (see create_sketch)
+
+            Returns:
+                    sketch (dict): The merged sketch
+    '''
+    merged = create_sketch(sketches[0]['relative_accuracy'] if sketches else sketch_relative_accuracy)
+
+    for sketch in sketches:
+        if sketch['relative_accuracy'] != merged['relative_accuracy']:
+            raise ValueError('Sketches with a different relative accuracy cannot be merged')
+
+        merged['count'] += sketch['count']
+        merged['zero'] += sketch['zero']
+        merged['minimum'] = min(merged['minimum'], sketch['minimum'])
+        merged['maximum'] = max(merged['maximum'], sketch['maximum'])
+        for store in ('positive', 'negative'):
+            for index, count in sketch[store].items():
+                merged[store][index] = merged[store].get(index, 0) + count
+
+    return merged
+
+def sketch_quantiles(sketch: dict, quantiles: list) -> list:
+    '''
+    Returns the given quantiles (between 0 and 1) of the values in the sketch. The result has the
+    relative accuracy of the sketch and is clamped to the minimum and maximum value.
+
+            Parameters:
+                    sketch (dict): The sketch (see create_sketch)
+                    quantiles (list): Quantiles to calculate (e.g. [0.5, 0.99])
+
+            Returns:
+                    values (list): The values of the quantiles (None if the sketch is empty)
+    '''
+    if sketch['count'] == 0:
+        return [None for _ in quantiles]
+
+    gamma = math.exp(__log_gamma(sketch))
+
+    # Representative value and count of all buckets in ascending order
+    buckets = [(-2 * gamma ** index / (gamma + 1), sketch['negative'][index]) for index in sorted(sketch['negative'], reverse=True)]
+    buckets.append((0.0, sketch['zero']))
+    buckets.extend((2 * gamma ** index / (gamma + 1), sketch['positive'][index]) for index in sorted(sketch['positive']))
+
+    values = np.array([bucket[0] for bucket in buckets])
+    cumulative = np.cumsum([bucket[1] for bucket in buckets])
+
+    results = list()
+    for quantile in quantiles:
+        rank = quantile * (sketch['count'] - 1)
+        value = float(values[np.searchsorted(cumulative, rank, side='right')])
+        results.append(min(max(value, sketch['minimum']), sketch['maximum']))
+
+    return results
+
+def save_sketch(sketch: dict, filename: str) -> None:
+    '''
+    Saves the sketch as JSON file.
+
+            Parameters:
+                    sketch (dict): The sketch (see create_sketch)
+                    filename (str): Path to the output file
+    '''
+    data = dict(sketch)
+    data['positive'] = sorted(sketch['positive'].items())
+    data['negative'] = sorted(sketch['negative'].items())
+
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+def load_sketch(filename: str) -> dict:
+    '''
+    Loads a sketch saved with save_sketch.
+
+            Parameters:
+                    filename (str): Path to the sketch file
+
+            Returns:
+                    sketch (dict): The sketch (see create_sketch)
+    '''
+    with open(filename, 'r', encoding='utf-8') as file:
+        sketch = json.load(file)
+
+    sketch['positive'] = {index: count for index, count in sketch['positive']}
+    sketch['negative'] = {index: count for index, count in sketch['negative']}
+    return sketch
+
+def __log_gamma(sketch: dict) -> float:
+    '''
+    Returns the logarithm of the bucket growth factor gamma = (1 + a) / (1 - a).
+    '''
+    accuracy = sketch['relative_accuracy']
+    return math.log((1 + accuracy) / (1 - accuracy))
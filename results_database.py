@@ -0,0 +1,120 @@
+import sqlite3
+from datetime import datetime
+
+# Columns of the tests table that are taken from the summary of a test (all other values of the
+# summary are stored in the metrics table)
+test_columns = ('t_uid', 'connection_type', 'datagram_size', 'cycle_time', 'qos', 'stress_type', 'stress_intensity', 'stress_location', 'duration', 'datagrams', 'bandwidth')
+
+# Values of the summary that identify the test (not stored as metrics)
+key_columns = ('campaign', 'scenario', 'test')
+
+schema = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created TEXT NOT NULL,
+    version TEXT,
+    os TEXT
+);
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    UNIQUE (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    campaign_id INTEGER NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    UNIQUE (campaign_id, name)
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    scenario_id INTEGER NOT NULL REFERENCES scenarios(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    t_uid TEXT,
+    connection_type TEXT,
+    datagram_size INTEGER,
+    cycle_time INTEGER,
+    qos TEXT,
+    stress_type TEXT,
+    stress_intensity REAL,
+    stress_location TEXT,
+    duration REAL,
+    datagrams INTEGER,
+    bandwidth REAL,
+    output TEXT,
+    UNIQUE (scenario_id, name)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    test_id INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value NUMERIC,
+    PRIMARY KEY (test_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tests_datagram_size ON tests (datagram_size);
+CREATE INDEX IF NOT EXISTS tests_cycle_time ON tests (cycle_time);
+CREATE INDEX IF NOT EXISTS tests_stress ON tests (stress_type, stress_intensity, stress_location);
+CREATE INDEX IF NOT EXISTS campaigns_name ON campaigns (name);
+'''
+
+def open_database(path: str) -> sqlite3.Connection:
+    '''
+    Opens (and creates if necessary) the results database.
+
+            Parameters:
+                    path (str): Path to the SQLite database file
+
+            Returns:
+                    connection (sqlite3.Connection): Connection to the database
+    '''
+    connection = sqlite3.connect(path, timeout=60)
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.executescript(schema)
+    return connection
+
+def store_run(connection: sqlite3.Connection, name: str, version: str, os_name: str) -> int:
+    '''
+    Stores an execution of the eParser (identified by the name of its output folder, so an incremental
+    execution into the same folder reuses its run).
+
+            Parameters:
+                    connection (sqlite3.Connection): Connection to the database
+                    name (str): Name of the output folder of the execution
+                    version (str): eParser version
+                    os_name (str): Operating system of the execution
+
+            Returns:
+                    run_id (int): ID of the run
+    '''
+    with connection:
+        connection.execute('INSERT INTO runs (name, created, version, os) VALUES (?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET version = excluded.version',
+                           (name, datetime.now().isoformat(timespec='seconds'), version, os_name))
+
+    return connection.execute('SELECT id FROM runs WHERE name = ?', (name,)).fetchone()[0]
+
+def store_test(connection: sqlite3.Connection, run_id: int, summary: dict, output: str) -> None:
+    '''
+    Stores the summary of a test (see performance_evaluation.evaluate_performance) in the database. A
+    test stored before in the same run is replaced.
+
+            Parameters:
+                    connection (sqlite3.Connection): Connection to the database
+                    run_id (int): ID of the run (see store_run)
+                    summary (dict): Summary of the test (including 'campaign', 'scenario', 'test')
+                    output (str): Path to the output folder of the test (relative to the execution)
+    '''
+    with connection:
+        connection.execute('INSERT OR IGNORE INTO campaigns (run_id, name) VALUES (?, ?)', (run_id, summary['campaign']))
+        campaign_id = connection.execute('SELECT id FROM campaigns WHERE run_id = ? AND name = ?', (run_id, summary['campaign'])).fetchone()[0]
+
+        connection.execute('INSERT OR IGNORE INTO scenarios (campaign_id, name) VALUES (?, ?)', (campaign_id, summary['scenario']))
+        scenario_id = connection.execute('SELECT id FROM scenarios WHERE campaign_id = ? AND name = ?', (campaign_id, summary['scenario'])).fetchone()[0]
+
+        connection.execute('DELETE FROM tests WHERE scenario_id = ? AND name = ?', (scenario_id, summary['test']))
+        cursor = connection.execute(f'INSERT INTO tests (scenario_id, name, output, {", ".join(test_columns)}) VALUES (?, ?, ?{", ?" * len(test_columns)})',
+                                    (scenario_id, summary['test'], output, *[summary.get(column) for column in test_columns]))
+
+        connection.executemany('INSERT INTO metrics (test_id, name, value) VALUES (?, ?, ?)',
+                               [(cursor.lastrowid, name, value) for name, value in summary.items() if name not in test_columns and name not in key_columns])